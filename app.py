@@ -6,7 +6,6 @@ import signal
 import sys
 import gradio as gr
 import pandas as pd
-import toml
 from gradio_mcp.log import logger 
 from gradio_mcp.proxies import (
     get_all_proxies,
@@ -14,6 +13,8 @@ from gradio_mcp.proxies import (
     get_proxy_by_program_id,
     new_proxy,
     update_proxy_by_name,
+    search_proxies,
+    batch_proxy_operations,
     delete_proxy_by_name
 )
 from gradio_mcp.visitors import (
@@ -28,8 +29,12 @@ from gradio_mcp.programs import (
     list_programs,
     new_program,
     program_controller,
+    bulk_program_controller,
     delete_program,
-    watch_log
+    watch_log,
+    query_program_logs,
+    set_restart_policy,
+    boot_programs
 )
 from gradio_mcp.client_configs import (
     get_client_config_by_id,
@@ -37,6 +42,7 @@ from gradio_mcp.client_configs import (
     update_client_config,
     delete_client_config
 )
+from utils import toml_backend
 from utils.database import DataBase
 from utils.program_manager import ProgramManager
 
@@ -126,6 +132,20 @@ def page_proxies_mcp():
         outputs = "text"
     )
 
+    gr.Markdown("## search_proxies")
+    gr.Interface(
+        fn = search_proxies,
+        inputs = ["text", "text", "text"],
+        outputs = "text"
+    )
+
+    gr.Markdown("## batch_proxy_operations")
+    gr.Interface(
+        fn = batch_proxy_operations,
+        inputs = ["text", "text"],
+        outputs = "text"
+    )
+
 def page_visitors_mcp():
     gr.Markdown(f"# {_('观察者工具')}")
 
@@ -186,6 +206,13 @@ def page_programs_mcp():
         inputs = ["text", "text"],
         outputs = "text"
     )
+
+    gr.Markdown("## bulk_program_controller")
+    gr.Interface(
+        fn = bulk_program_controller,
+        inputs = ["text", "text", "text"],
+        outputs = "text"
+    )
     
     gr.Markdown("## delete_program")
     gr.Interface(
@@ -193,6 +220,20 @@ def page_programs_mcp():
         inputs = "text",
         outputs = "text"
     )
+    
+    gr.Markdown("## set_restart_policy")
+    gr.Interface(
+        fn = set_restart_policy,
+        inputs = ["text", "text"],
+        outputs = "text"
+    )
+    
+    gr.Markdown("## query_program_logs")
+    gr.Interface(
+        fn = query_program_logs,
+        inputs = ["text", "text", "text", "text", "text", "text"],
+        outputs = "text"
+    )
 
 def clean_codebox():
   return gr.Code(value="")
@@ -268,7 +309,7 @@ def page_proxies(tab_var):
       
       def new_proxy_from_code(pname, toml_str):
         try:
-          data = json.dumps(toml.loads(toml_str), ensure_ascii=False)
+          data = json.dumps(toml_backend.loads(toml_str), ensure_ascii=False)
         except Exception as e:
           logger.error("TOML 格式转换失败，错误:%s" % str(e))
           raise gr.Error(_("TOML 格式转换失败，错误:%s") % str(e))
@@ -367,7 +408,7 @@ def page_proxies(tab_var):
           logger.error(f"获取隧道配置错误，错误:{msg['message']}")
           raise gr.Error(_("获取隧道配置错误"))
 
-        data = toml.dumps(msg['data'])
+        data = toml_backend.dumps(msg['data'])
         
         return gr.Code(data)
         
@@ -382,7 +423,7 @@ def page_proxies(tab_var):
           program_id_name_map[i['name']] = str(i['id'])
         
         try:
-          data = json.dumps(toml.loads(config), ensure_ascii=False)
+          data = json.dumps(toml_backend.loads(config), ensure_ascii=False)
         except Exception as e:
           logger.error("TOML 格式转换失败，错误:%s" % str(e))
           raise gr.Error(_("TOML 格式转换失败，错误:%s") % str(e))
@@ -495,7 +536,7 @@ def page_visitors(tab_var):
       
       def new_visitor_from_code(pname, toml_str):
         try:
-          cfg = toml.loads(toml_str)
+          cfg = toml_backend.loads(toml_str)
         except Exception as e:
           logger.error("TOML 格式转换失败，错误:%s" % str(e))
           raise gr.Error(_("TOML 格式转换失败，错误:%s") % str(e))
@@ -592,7 +633,7 @@ def page_visitors(tab_var):
           logger.error("获取观察者配置错误，错误: %s" % msg['message'])
           raise gr.Error(_("获取观察者配置错误"))
 
-        data = toml.dumps(msg['data'])
+        data = toml_backend.dumps(msg['data'])
         
         return gr.Code(data)
       
@@ -607,7 +648,7 @@ def page_visitors(tab_var):
           program_id_name_map[i['name']] = str(i['id'])
         
         try:
-          data = json.dumps(toml.loads(config), ensure_ascii=False)
+          data = json.dumps(toml_backend.loads(config), ensure_ascii=False)
         except Exception as e:
           logger.error("TOML 格式转换失败，错误:%s" % str(e))
           raise gr.Error(_("TOML 格式转换失败，错误:%s") % str(e))
@@ -853,7 +894,7 @@ def page_programs(tab_var):
             logger.error("获取客户端配置文件失败，错误: %s" % msg['message'])
             raise gr.Error(_("获取客户端配置文件失败"))
 
-          data = toml.dumps(msg['data'])
+          data = toml_backend.dumps(msg['data'])
           
           return gr.Code(data)
         
@@ -868,7 +909,7 @@ def page_programs(tab_var):
             program_id_name_map[i['name']] = str(i['id'])
           
           try:
-            data = json.dumps(toml.loads(config), ensure_ascii=False)
+            data = json.dumps(toml_backend.loads(config), ensure_ascii=False)
           except Exception as e:
             logger.error("TOML 格式转换失败，错误:%s" % str(e))
             raise gr.Error(_("TOML 格式转换失败，错误:%s") % str(e))
@@ -938,7 +979,7 @@ def page_programs(tab_var):
         program_name_ip_map = get_program_name_ip_map()
         
         try:
-          data = json.dumps(toml.loads(config), ensure_ascii=False)
+          data = json.dumps(toml_backend.loads(config), ensure_ascii=False)
         except Exception as e:
           logger.error("TOML 格式转换失败，错误:%s" % str(e))
           raise gr.Error("TOML 格式转换失败，错误:%s" % str(e))
@@ -998,12 +1039,16 @@ def page_logs(tab_var):
     max_height=400,
     )
 
-  btn.click(
+  watch_log_event = btn.click(
     fn=watch_log, 
     inputs=[dropdown], 
     outputs=log_html_box,
     show_api=False,
+    concurrency_limit=None,
     )
+  # 切换客户端或重新进入页面时停止之前的日志跟踪
+  dropdown.change(fn=None, cancels=[watch_log_event], show_api=False)
+  tab_var.select(fn=None, cancels=[watch_log_event], show_api=False)
 
 def get_dp_choices_for_program_name():
   program_list = list_programs()
@@ -1068,7 +1113,7 @@ with gr.Blocks(title="frpc centralized panel", css=css) as demo:
 
 def _cleanup_before_exit(type_: str = ""):
   logger.info(f"收到退出信号{type_}，开始清理工作…")
-  program_manager.stop_all()
+  program_manager.shutdown()
 
 # 在程序正常退出时也执行一次清理
 atexit.register(_cleanup_before_exit)
@@ -1083,6 +1128,11 @@ if __name__ == "__main__":
       init()
     elif not os.path.exists(os.path.join(data_path, "data.db")):
       init()
+    else:
+      with DataBase(os.path.join(data_path, "data.db")) as db:
+        db.upgrade_db()
+      # 在后台启动期望状态为运行的客户端
+      boot_programs()
     
     demo.launch(
         mcp_server=True, 
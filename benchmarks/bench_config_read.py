@@ -0,0 +1,113 @@
+# 其它进程间歇持有配置文件锁时，多线程并发读取配置的吞吐量和延迟
+#
+# 另一个进程按 20ms 持有、20ms 释放的节奏占用文件锁(例如其它面板进程正在写入)，
+# 32 个线程共读取 2000 次。默认使用当前不加锁的 load_config；加 --locked 时每次读取
+# 先获取文件锁，即读取不加锁之前的做法。
+#
+# 用法(在仓库根目录): python benchmarks/bench_config_read.py [--readers 32] [--loads 2000] [--locked]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ConfigManager import ConfigManager
+
+# 锁的持有与释放时长(秒)
+HOLD_SECONDS = 0.02
+RELEASE_SECONDS = 0.02
+
+HOLDER = """
+import sys, time
+from filelock import FileLock
+lock = FileLock(sys.argv[1])
+hold, release = float(sys.argv[2]), float(sys.argv[3])
+print("ready", flush=True)
+while True:
+    with lock:
+        time.sleep(hold)
+    time.sleep(release)
+"""
+
+def _write_config(path: str, proxies: int):
+    lines = ['serverAddr = "127.0.0.1"', "serverPort = 7000", ""]
+    for i in range(proxies):
+        lines += [
+            "[[proxies]]",
+            f'name = "p{i}"',
+            'type = "tcp"',
+            f"localPort = {10000 + i}",
+            f"remotePort = {20000 + i}",
+            "",
+        ]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=32)
+    parser.add_argument("--loads", type=int, default=2000)
+    parser.add_argument("--proxies", type=int, default=50)
+    parser.add_argument("--locked", action="store_true", help="每次读取先获取文件锁")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cfg_file = os.path.join(tmp, "frpc.toml")
+        _write_config(cfg_file, args.proxies)
+        lock_file = ConfigManager(cfg_file).lock_file
+        holder = subprocess.Popen(
+            [sys.executable, "-c", HOLDER, str(lock_file), str(HOLD_SECONDS), str(RELEASE_SECONDS)],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        holder.stdout.readline()
+
+        remaining = [args.loads]
+        counter_lock = threading.Lock()
+        latencies = []
+
+        def reader():
+            while True:
+                with counter_lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                # 与接口的用法一致，每次读取都新建 ConfigManager
+                manager = ConfigManager(cfg_file)
+                start = time.perf_counter()
+                if args.locked:
+                    with manager.lock:
+                        manager.load_config()
+                else:
+                    manager.load_config()
+                elapsed = time.perf_counter() - start
+                with counter_lock:
+                    latencies.append(elapsed)
+
+        try:
+            threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            total = time.perf_counter() - start
+        finally:
+            holder.kill()
+            holder.wait()
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    mode = "读取先获取文件锁" if args.locked else "读取不加锁"
+    print(f"{mode}, {args.readers} 个线程, {args.loads} 次读取:")
+    print(f"  吞吐量: {args.loads / total:.0f} 次/秒")
+    print(f"  p50:    {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"  p99:    {p99 * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
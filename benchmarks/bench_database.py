@@ -0,0 +1,77 @@
+# 数据库单条查询耗时: 每次查询新建连接 vs 线程本地长连接池
+#
+# 用法(在仓库根目录): python benchmarks/bench_database.py [--rows 10000] [--iterations 2000]
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import DataBase
+
+def _populate(db_path: str, rows: int):
+    with DataBase(db_path) as db:
+        db.init_db()
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO program (id, name, description) VALUES (?, ?, ?)",
+        ((i, f"client-{i}", "benchmark") for i in range(1, rows + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO admin_port (port, program_id) VALUES (?, ?)",
+        ((20000 + i, i) for i in range(1, rows + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+def _connect_per_call(db_path: str, ids):
+    # 连接池之前 DataBase 的做法: 每个 with 块打开并关闭一个新连接
+    for program_id in ids:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM admin_port WHERE program_id = ?", (program_id,))
+        cursor.fetchall()
+        cursor.close()
+        conn.close()
+
+def _pooled(db_path: str, ids):
+    for program_id in ids:
+        with DataBase(db_path) as db:
+            db.query_admin_port(program_id=program_id)
+
+def _registry(db_path: str, ids):
+    for program_id in ids:
+        with DataBase(db_path) as db:
+            db.query_program(program_id)
+
+def _measure(func, db_path: str, ids) -> float:
+    """返回每次查询的平均耗时(微秒)"""
+    start = time.perf_counter()
+    func(db_path, ids)
+    return (time.perf_counter() - start) / len(ids) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "data.db")
+        _populate(db_path, args.rows)
+        rng = random.Random(0)
+        ids = [rng.randint(1, args.rows) for _ in range(args.iterations)]
+        # 预热连接池和程序注册表
+        _pooled(db_path, ids[:10])
+        _registry(db_path, ids[:10])
+        print(f"{args.rows} 行, {args.iterations} 次查询, 每次查询平均耗时:")
+        print(f"  每次新建连接:          {_measure(_connect_per_call, db_path, ids):8.1f} us")
+        print(f"  长连接池 (SQL 查询):   {_measure(_pooled, db_path, ids):8.1f} us")
+        print(f"  query_program (注册表): {_measure(_registry, db_path, ids):8.1f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# 大配置的实体类校验与序列化耗时
+#
+# 用 tcp、http、stcp 混合的 2000 条隧道的配置字典，取 15 次中的最好成绩测量
+# load_config_dict(一次 model_validate) 和 ClientConfig.model_dump。
+# 对比改动前的实体类时，用 --tree 指定另一份代码的目录，例如:
+#   git worktree add /tmp/before 1f8f2e4^
+#   python benchmarks/bench_models.py --tree /tmp/before
+#
+# 用法(在仓库根目录): python benchmarks/bench_models.py [--proxies 2000] [--repeat 15] [--tree DIR]
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _make_data(proxies: int) -> dict:
+    items = []
+    for i in range(proxies):
+        kind = ("tcp", "http", "stcp")[i % 3]
+        item = {"name": f"p{i}", "type": kind, "localIP": "127.0.0.1", "localPort": 10000 + i % 50000}
+        if kind == "tcp":
+            item["remotePort"] = 20000 + i
+        elif kind == "http":
+            item["customDomains"] = [f"p{i}.example.com"]
+        else:
+            item["secretKey"] = f"key{i}"
+        items.append(item)
+    return {"serverAddr": "127.0.0.1", "serverPort": 7000, "proxies": items}
+
+def _best(func, repeat: int) -> float:
+    """返回 repeat 次中最短的耗时(毫秒)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--proxies", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--tree", default=REPO_ROOT, help="从这个目录导入 entity 和 utils")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(args.tree))
+    from utils.load2class import load_config_dict
+
+    data = _make_data(args.proxies)
+    config = load_config_dict(data)
+    print(f"{args.tree}: {args.proxies} 条隧道, {args.repeat} 次取最好成绩:")
+    print(f"  校验:   {_best(lambda: load_config_dict(data), args.repeat):6.1f} ms")
+    print(f"  序列化: {_best(lambda: config.model_dump(exclude_none=True, by_alias=True), args.repeat):6.1f} ms")
+
+if __name__ == "__main__":
+    main()
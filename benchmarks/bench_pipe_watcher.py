@@ -0,0 +1,103 @@
+# 同时运行大量 frpc 进程时面板的线程数和内存占用
+#
+# 用 shell 脚本代替 frpc，每秒向 stdout 输出一行。默认使用 FrpcInstance(所有管道由后台事件循环读取)，
+# 加 --threads 时改用旧的做法: 每个进程两个阻塞在 readline 上的线程。
+#
+# 用法(在仓库根目录): python benchmarks/bench_pipe_watcher.py [--processes 300] [--seconds 5] [--threads]
+import argparse
+import os
+import resource
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.background_loop import submit
+from utils.frpc_instance import FrpcInstance
+
+FAKE_FRPC = """#!/bin/sh
+while :; do
+    echo "[I] [service.go:300] login to server success"
+    sleep 1
+done
+"""
+
+def _os_threads() -> int:
+    """当前进程的 OS 线程数"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("Threads:"):
+                return int(line.split()[1])
+    return threading.active_count()
+
+def _make_executable(directory: str) -> str:
+    path = os.path.join(directory, "frpc")
+    with open(path, "w") as f:
+        f.write(FAKE_FRPC)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    return path
+
+def _run_instances(tmp: str, processes: int, seconds: float):
+    instances = []
+    for i in range(processes):
+        # 日志文件写在可执行文件旁边，每个实例使用单独的目录
+        client_dir = os.path.join(tmp, str(i))
+        os.makedirs(client_dir)
+        instance = FrpcInstance(_make_executable(client_dir), os.path.join(client_dir, "frpc.toml"), str(i))
+        instance.start()
+        instances.append(instance)
+    time.sleep(seconds)
+    threads = _os_threads()
+    for instance in instances:
+        submit(instance.stop()).result()
+    return threads
+
+def _run_threads(tmp: str, processes: int, seconds: float):
+    def pump(pipe):
+        for _ in iter(pipe.readline, b""):
+            pass
+
+    executable = _make_executable(tmp)
+    children = []
+    for _ in range(processes):
+        process = subprocess.Popen(
+            [executable, "-c", "frpc.toml"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            stdin=subprocess.DEVNULL,
+        )
+        for pipe in (process.stdout, process.stderr):
+            threading.Thread(target=pump, args=(pipe,), daemon=True).start()
+        children.append(process)
+    time.sleep(seconds)
+    threads = _os_threads()
+    for process in children:
+        process.kill()
+        process.wait()
+    return threads
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=300)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--threads", action="store_true", help="使用每个进程两个读取线程的旧做法")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.threads:
+            threads = _run_threads(tmp, args.processes, args.seconds)
+        else:
+            threads = _run_instances(tmp, args.processes, args.seconds)
+    # Linux 上 ru_maxrss 的单位是 KB
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    mode = "每个进程两个读取线程" if args.threads else "FrpcInstance + PipeWatcher"
+    print(f"{mode}, {args.processes} 个进程:")
+    print(f"  线程数:   {threads}")
+    print(f"  最大 RSS: {max_rss:.1f} MB")
+
+if __name__ == "__main__":
+    main()
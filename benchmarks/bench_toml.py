@@ -0,0 +1,72 @@
+# 大配置文件的 TOML 解析、加载和序列化耗时
+#
+# 生成一个包含 2000 条 tcp 隧道的 frpc.toml，每项取 15 次中的最好成绩:
+# - 解析: toml.loads 与 toml_backend.loads(tomllib / tomli)
+# - 完整加载: 旧的 toml + JSON 往返 + 加载实体类，与当前直接从字典加载
+# - 序列化: toml.dumps，安装了 tomli_w 时一并对比
+#
+# 用法(在仓库根目录): python benchmarks/bench_toml.py [--proxies 2000] [--repeat 15]
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import toml
+from utils import toml_backend
+from utils.load2class import load_config_dict
+
+def _make_config(proxies: int) -> str:
+    lines = ['serverAddr = "127.0.0.1"', "serverPort = 7000", ""]
+    for i in range(proxies):
+        lines += [
+            "[[proxies]]",
+            f'name = "p{i}"',
+            'type = "tcp"',
+            'localIP = "127.0.0.1"',
+            f"localPort = {10000 + i % 50000}",
+            f"remotePort = {20000 + i}",
+            "",
+        ]
+    return "\n".join(lines)
+
+def _best(func, repeat: int) -> float:
+    """返回 repeat 次中最短的耗时(毫秒)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def _json_round_trip_load(text: str):
+    # user-019 之前 load_config 的流程: toml 解析后转成 JSON 字符串再解析回来
+    return load_config_dict(json.loads(json.dumps(toml.loads(text), indent=4)))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--proxies", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    text = _make_config(args.proxies)
+    data = load_config_dict(toml_backend.loads(text)).model_dump(exclude_none=True, by_alias=True)
+    reader = getattr(toml_backend._reader, "__name__", "toml")
+
+    print(f"{args.proxies} 条隧道, {args.repeat} 次取最好成绩:")
+    print(f"  解析      toml.loads:               {_best(lambda: toml.loads(text), args.repeat):7.1f} ms")
+    print(f"  解析      {reader + '.loads:':<26}{_best(lambda: toml_backend.loads(text), args.repeat):7.1f} ms")
+    print(f"  完整加载  toml + JSON 往返:         {_best(lambda: _json_round_trip_load(text), args.repeat):7.1f} ms")
+    print(f"  完整加载  load_config_dict:         {_best(lambda: load_config_dict(toml_backend.loads(text)), args.repeat):7.1f} ms")
+    print(f"  序列化    toml.dumps:               {_best(lambda: toml.dumps(data), args.repeat):7.1f} ms")
+    try:
+        import tomli_w
+    except ImportError:
+        print("  序列化    tomli_w.dumps:            未安装 tomli_w，已跳过")
+    else:
+        print(f"  序列化    tomli_w.dumps:            {_best(lambda: tomli_w.dumps(data), args.repeat):7.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, SerializeAsAny
+from pydantic import BaseModel
 from typing import List, Dict, Optional
 from entity.common import (
     LogConfig, 
@@ -6,8 +6,8 @@ from entity.common import (
     TLSConfig,
     QUICOptions
     )
-from entity.proxy import ProxyBaseConfig
-from entity.visitor import VisitorBaseConfig
+from entity.proxy import ProxyConfig
+from entity.visitor import VisitorConfig
 
 class TLSClientConfig(TLSConfig):
     enable: Optional[bool] = None
@@ -58,5 +58,5 @@ class ClientCommonConfig(BaseModel):
     includes: Optional[List[str]] = None
 
 class ClientConfig(ClientCommonConfig):
-    proxies: Optional[List[SerializeAsAny[ProxyBaseConfig]]] = []
-    visitors: Optional[List[SerializeAsAny[VisitorBaseConfig]]] = []
+    proxies: Optional[List[ProxyConfig]] = []
+    visitors: Optional[List[VisitorConfig]] = []
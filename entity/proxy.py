@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Literal, Optional
+from typing import Annotated, List, Dict, Literal, Optional, Type, Union
 from entity.plugin import BasePlugin
 from entity.common import HTTPHeader, HeaderOperations
 
@@ -46,12 +46,15 @@ class DomainConfig(BaseModel):
     subDomain: Optional[str] = None
 
 class TCPProxyConfig(ProxyBaseConfig):
+    type_: Literal['tcp'] = Field('tcp', alias="type")
     remotePort: Optional[int] = None
 
 class UDPProxyConfig(ProxyBaseConfig):
+    type_: Literal['udp'] = Field('udp', alias="type")
     remotePort: Optional[int] = None
 
 class HTTPProxyConfig(ProxyBaseConfig, DomainConfig):
+    type_: Literal['http'] = Field('http', alias="type")
     locations: Optional[List[str]] = None
     httpUser: Optional[str] = None
     httpPassword: Optional[str] = None
@@ -61,22 +64,53 @@ class HTTPProxyConfig(ProxyBaseConfig, DomainConfig):
     routeByHTTPUser: Optional[str] = None
 
 class HTTPSProxyConfig(ProxyBaseConfig, DomainConfig):
-    pass
+    type_: Literal['https'] = Field('https', alias="type")
 
 class TCPMuxProxyConfig(ProxyBaseConfig, DomainConfig):
+    type_: Literal['tcpmux'] = Field('tcpmux', alias="type")
     httpUser: Optional[str] = None
     httpPassword: Optional[str] = None
     routeByHTTPUser: Optional[str] = None
     multiplexer: Optional[str] = None
 
 class STCPProxyConfig(ProxyBaseConfig):
+    type_: Literal['stcp'] = Field('stcp', alias="type")
     secretKey: Optional[str] = None
     allowUsers: Optional[List[str]] = None
 
 class XTCPProxyConfig(ProxyBaseConfig):
+    type_: Literal['xtcp'] = Field('xtcp', alias="type")
     secretKey: Optional[str] = None
     allowUsers: Optional[List[str]] = None
 
 class SUDPProxyConfig(ProxyBaseConfig):
+    type_: Literal['sudp'] = Field('sudp', alias="type")
     secretKey: Optional[str] = None
     allowUsers: Optional[List[str]] = None
+
+# 按 type 字段区分的隧道配置，pydantic 会根据 type 直接选择对应的类校验和序列化
+ProxyConfig = Annotated[
+    Union[
+        TCPProxyConfig,
+        UDPProxyConfig,
+        HTTPProxyConfig,
+        HTTPSProxyConfig,
+        TCPMuxProxyConfig,
+        STCPProxyConfig,
+        XTCPProxyConfig,
+        SUDPProxyConfig,
+    ],
+    Field(discriminator="type_"),
+]
+
+# 定义类型映射
+PROXY_TYPE_MAP: Dict[str, Type[ProxyBaseConfig]] = {
+    'tcp': TCPProxyConfig,
+    'udp': UDPProxyConfig,
+    'http': HTTPProxyConfig,
+    'https': HTTPSProxyConfig,
+    'stcp': STCPProxyConfig,
+    'sudp': SUDPProxyConfig,
+    'xtcp': XTCPProxyConfig,
+    'tcpmux': TCPMuxProxyConfig,
+}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Literal, Optional, Union
+from typing import Annotated, Dict, Literal, Optional, Type, Union
 
 class VisitorTransport(BaseModel):
     useEncryption: Optional[bool] = None
@@ -16,15 +16,28 @@ class VisitorBaseConfig(BaseModel):
     serverName: Optional[str] = None
 
 class STCPVisitorConfig(VisitorBaseConfig):
-    pass
+    type_: Literal['stcp'] = Field('stcp', alias="type")
 
 class SUDPVisitorConfig(VisitorBaseConfig):
-    pass
+    type_: Literal['sudp'] = Field('sudp', alias="type")
 
 class XTCPVisitorConfig(VisitorBaseConfig):
+    type_: Literal['xtcp'] = Field('xtcp', alias="type")
     protocol: Literal['quic', 'kcp'] = 'quic'
     keepTunnelOpen: Optional[bool] = None
     maxRetriesAnHour: int = 8
     minRetryInterval: int = 90
     fallbackTo: Optional[str] = None
     fallbackTimeoutMs: Optional[int] = None
+
+# 按 type 字段区分的观察者配置
+VisitorConfig = Annotated[
+    Union[STCPVisitorConfig, SUDPVisitorConfig, XTCPVisitorConfig],
+    Field(discriminator="type_"),
+]
+
+VISITOR_TYPE_MAP: Dict[str, Type[VisitorBaseConfig]] = {
+    'stcp': STCPVisitorConfig,
+    'sudp': SUDPVisitorConfig,
+    'xtcp': XTCPVisitorConfig,
+}
@@ -1,8 +1,10 @@
 import json
 import logging
 import os
+import threading
 from entity.client import ClientConfig
 from utils.ConfigManager import ConfigManager
+from utils.config_index import ConfigIndex
 from utils.database import DataBase
 
 # 数据库和命令目录
@@ -10,43 +12,95 @@ database_path = "data/data.db"
 cmd_dir = "data/cmd"
 logger = logging.getLogger("gradio_mcp.client_configs")
 
-def check_admin_ui_port_conflict(
-    new_port: int, 
-    current_id: str | None = None
-    ) -> dict | None:
+# webServer 没有填写端口时，自动分配 admin UI 端口的范围（包含两端）
+ADMIN_UI_PORT_RANGE = (7400, 7499)
+
+# 端口分配表是否已从配置文件回填
+_admin_ports_synced = False
+_admin_ports_lock = threading.Lock()
+
+def sync_admin_ports():
+    """
+    从各客户端的 frpc.toml 回填 admin UI 端口分配表
+
+    每个进程只在首次使用时扫描一次配置文件，之后由创建、修改和删除客户端配置时同步维护。
+    多个客户端配置了同一端口时，只登记第一个，其余的记录警告。
     """
-    检查 admin UI 端口是否与其他客户端配置冲突。
+    global _admin_ports_synced
+    with _admin_ports_lock:
+        if _admin_ports_synced:
+            return
+        with DataBase(database_path) as db:
+            ids = db.program_ids()
+        ports = {}
+        owners = {}
+        for entry in os.listdir(cmd_dir) if os.path.isdir(cmd_dir) else []:
+            if entry not in ids:
+                continue
+            cfg_file = os.path.join(cmd_dir, entry, "frpc.toml")
+            if not os.path.isfile(cfg_file):
+                continue
+            try:
+                cfg = ConfigManager(cfg_file).load_config()
+            except Exception:
+                logger.warning(f"回填admin ui端口时，读取配置文件 {cfg_file} 出错，已跳过")
+                continue
+            if not cfg.webServer or not cfg.webServer.port:
+                continue
+            port = cfg.webServer.port
+            if port in owners:
+                logger.warning(f"客户端{entry}与客户端{owners[port]}的admin ui端口{port}冲突，未登记")
+                continue
+            owners[port] = entry
+            ports[int(entry)] = port
+        with DataBase(database_path) as db:
+            db.replace_admin_ports(ports)
+        _admin_ports_synced = True
 
-    遍历 cmd_dir 下所有客户端的 frpc.toml 配置，若发现已有客户端的
-    webServer.port 与 new_port 相同，则返回冲突信息，否则返回 None。
+def _claim_admin_port(program_id: str, body: dict) -> dict | None:
+    """
+    为客户端配置登记 admin UI 端口，webServer 没有填写端口时从 ADMIN_UI_PORT_RANGE 中自动分配并写回 body
 
-    Args:
-        new_port (int): 待检测的 admin UI 端口号。
-        current_id (str | None): 当前客户端 ID（更新时跳过自身），默认为 None。
+    没有 webServer 时释放客户端原有的端口。
 
     Returns:
-        dict | None: 
-            - 若发生冲突，返回 {"status": "失败", "message": "..."}； 
-            - 无冲突时返回 None。
+        dict | None: 失败时返回 {"status": "失败", "message": "..."}，成功时返回 None
     """
-    for entry in os.listdir(cmd_dir):
-        if current_id and entry == current_id:
-            continue
-        cfg_file = os.path.join(cmd_dir, entry, "frpc.toml")
-        if not os.path.isfile(cfg_file):
-            continue
-        try:
-            exist_cfg = ConfigManager(cfg_file).load_config()
-        except Exception:
-            logger.warning(f"在验证端口冲突时，读取配置文件 {cfg_file} 时出错，已跳过")
-            continue
-        if exist_cfg.webServer and exist_cfg.webServer.port == new_port:
-            return {
-                "status": "失败",
-                "message": f"admin ui端口号 {new_port} 已被客户端 {entry} 占用"
-            }
+    sync_admin_ports()
+    web_server = body.get("webServer")
+    try:
+        with DataBase(database_path) as db:
+            if not isinstance(web_server, dict):
+                db.release_admin_port(int(program_id))
+                return None
+            port = web_server.get("port")
+            if port is None:
+                port = db.allocate_admin_port(int(program_id), *ADMIN_UI_PORT_RANGE)
+                if port is None:
+                    return {
+                        "status": "失败",
+                        "message": f"admin ui端口范围{ADMIN_UI_PORT_RANGE[0]}-{ADMIN_UI_PORT_RANGE[1]}内没有空闲端口"
+                    }
+                web_server["port"] = port
+            else:
+                db.set_admin_port(int(program_id), int(port))
+    except ValueError as e:
+        return {"status": "失败", "message": f"admin ui端口号 {web_server.get('port')} 不可用: {e}"} # type: ignore
+    except Exception as e:
+        return {"status": "失败", "message": f"登记admin ui端口失败: {e}"}
     return None
 
+def _restore_admin_port(program_id: str, cfg: ClientConfig | None):
+    """配置保存失败时，把端口分配表恢复成 cfg 中的端口"""
+    try:
+        with DataBase(database_path) as db:
+            if cfg is not None and cfg.webServer and cfg.webServer.port:
+                db.set_admin_port(int(program_id), cfg.webServer.port)
+            else:
+                db.release_admin_port(int(program_id))
+    except Exception as e:
+        logger.warning(f"恢复客户端{program_id}的admin ui端口登记失败: {e}")
+
 
 def get_client_config_by_id(program_id: str) -> dict:
     """根据ID获取单个客户端配置
@@ -82,7 +136,7 @@ def get_client_config_by_id(program_id: str) -> dict:
 
     try:
         with DataBase(database_path) as db:
-            ids = [str(r[0]) for r in db.query_program()]
+            ids = db.program_ids()
     except Exception as e:
         return {"status": "失败", "message": f"数据库查询失败: {e}", "data": None}
 
@@ -125,6 +179,8 @@ def new_client_config(program_id: str, data: str) -> dict:
             }
         }  
     
+    webServer中的port可以不填，不填时会从7400-7499中自动分配一个未被其它客户端占用的端口。  
+    
     返回格式:
     ```json
     {
@@ -149,7 +205,7 @@ def new_client_config(program_id: str, data: str) -> dict:
     # 验证程序存在
     try:
         with DataBase(database_path) as db:
-            ids = [str(r[0]) for r in db.query_program()]
+            ids = db.program_ids()
     except Exception as e:
         return {"status": "失败", "message": f"数据库查询失败: {e}"}
 
@@ -166,24 +222,29 @@ def new_client_config(program_id: str, data: str) -> dict:
 
     try:
         body = json.loads(data)
-        cfg = ClientConfig(**body)
     except json.JSONDecodeError as e:
         return {"status": "失败", "message": f"JSON 解析失败: {e}"}
+    if not isinstance(body, dict):
+        return {"status": "失败", "message": "配置校验失败: data必须是json对象"}
+
+    # 登记 admin ui 端口，冲突时失败，没有填写端口时自动分配
+    msg = _claim_admin_port(program_id, body)
+    if msg:
+        return msg
+
+    try:
+        cfg = ClientConfig(**body)
     except Exception as e:
+        _restore_admin_port(program_id, None)
         return {"status": "失败", "message": f"配置校验失败: {e}"}
 
-    # 检查 admin ui 端口冲突
-    if cfg.webServer and cfg.webServer.port:
-        msg = check_admin_ui_port_conflict(cfg.webServer.port)
-        if msg:
-            return msg
-
     cfg.proxies = None
     cfg.visitors = None
 
     try:
         ConfigManager(cfg_file).save_config(cfg)
     except Exception as e:
+        _restore_admin_port(program_id, None)
         return {"status": "失败", "message": f"保存配置失败: {e}"}
 
     return {"status": "成功", "message": f"客户端{program_id}配置创建成功"}
@@ -222,7 +283,7 @@ def update_client_config(program_id: str, data: str) -> dict:
     # 验证程序存在
     try:
         with DataBase(database_path) as db:
-            ids = [str(r[0]) for r in db.query_program()]
+            ids = db.program_ids()
     except Exception as e:
         return {"status": "失败", "message": f"数据库查询失败: {e}"}
     if program_id not in ids:
@@ -234,18 +295,24 @@ def update_client_config(program_id: str, data: str) -> dict:
 
     try:
         body = json.loads(data)
-        new_cfg = ClientConfig(**body)
         old_cfg = ConfigManager(cfg_file).load_config()
     except json.JSONDecodeError as e:
         return {"status": "失败", "message": f"JSON 解析失败: {e}"}
     except Exception as e:
         return {"status": "失败", "message": f"配置校验失败: {e}"}
+    if not isinstance(body, dict):
+        return {"status": "失败", "message": "配置校验失败: data必须是json对象"}
 
-    # 检查 admin ui 端口冲突
-    if new_cfg.webServer and new_cfg.webServer.port:
-        msg = check_admin_ui_port_conflict(new_cfg.webServer.port, program_id)
-        if msg:
-            return msg
+    # 登记 admin ui 端口，冲突时失败，没有填写端口时自动分配
+    msg = _claim_admin_port(program_id, body)
+    if msg:
+        return msg
+
+    try:
+        new_cfg = ClientConfig(**body)
+    except Exception as e:
+        _restore_admin_port(program_id, old_cfg)
+        return {"status": "失败", "message": f"配置校验失败: {e}"}
     
     if old_cfg.proxies:
         new_cfg.proxies = old_cfg.proxies
@@ -256,6 +323,7 @@ def update_client_config(program_id: str, data: str) -> dict:
     try:
         ConfigManager(cfg_file).save_config(new_cfg)
     except Exception as e:
+        _restore_admin_port(program_id, old_cfg)
         return {"status": "失败", "message": f"保存配置失败: {e}"}
 
     return {"status": "成功", "message": f"客户端{program_id}配置更新成功"}
@@ -291,7 +359,7 @@ def delete_client_config(program_id: str) -> dict:
     # 验证程序存在
     try:
         with DataBase(database_path) as db:
-            ids = [str(r[0]) for r in db.query_program()]
+            ids = db.program_ids()
     except Exception as e:
         return {"status": "失败", "message": f"数据库查询失败: {e}"}
     if program_id not in ids:
@@ -305,5 +373,11 @@ def delete_client_config(program_id: str) -> dict:
         os.remove(cfg_file)
     except Exception as e:
         return {"status": "失败", "message": f"删除失败: {e}"}
+    ConfigIndex().remove_client(program_id)
+    try:
+        with DataBase(database_path) as db:
+            db.release_admin_port(int(program_id))
+    except Exception as e:
+        logger.warning(f"释放客户端{program_id}的admin ui端口失败: {e}")
 
     return {"status": "成功", "message": f"客户端{program_id}配置删除成功"}
\ No newline at end of file
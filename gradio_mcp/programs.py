@@ -1,13 +1,20 @@
 from utils.locale_m import _
 import asyncio
+import json
 import logging
 import os
 import shutil
+import time
+from collections import deque
 from utils.ConfigManager import ConfigManager
+from utils.config_diff import CHANGE_NONE, CHANGE_RESTART, classify_config_change
+from utils.config_index import ConfigIndex
 from utils.database import DataBase
-from utils.program_manager import ProgramManager
+from utils.background_loop import submit
+from utils.program_manager import DEFAULT_RESTART_POLICY, RESTART_POLICIES, ProgramManager
+from utils.status_collector import webserver_target
 import gradio as gr
-import requests
+import httpx
 
 # 临时配置文件地址
 database_path = "data/data.db"
@@ -16,6 +23,18 @@ logger = logging.getLogger("gradio_mcp.programs")
 
 ACTION_LIST = ["start", "stop", "restart", "reload"]
 
+# 查看日志时首次读取的日志文件末尾字节数
+WATCH_LOG_INITIAL_BYTES = 64 * 1024
+# 查看日志时最多显示的行数
+WATCH_LOG_MAX_LINES = 500
+# 查看日志时检查新日志的间隔（秒）
+WATCH_LOG_INTERVAL = 0.5
+
+# 请求frpc webserver热重载的超时时间（秒）
+RELOAD_TIMEOUT = 10.0
+# 批量操作客户端时默认的最大并发数
+BULK_ACTION_CONCURRENCY = 16
+
 manager = ProgramManager()
 
 def list_programs() -> dict:
@@ -32,6 +51,10 @@ def list_programs() -> dict:
                 "name": "示例 HK",
                 "description": "连接HK的客户端",
                 "status": "运行",
+                "restart_policy": "on-failure",
+                "desired_state": "running",
+                "restart_count": 0,
+                "crash_loop": false
             },
         ]
     }
@@ -47,6 +70,10 @@ def list_programs() -> dict:
             - `运行`: 客户端正在运行
             - `停止`: 客户端已停止
             - `未运行`: 客户端在MCP服务器启动后没运行过
+        - `restart_policy`: 重启策略，always(总是重启)、on-failure(异常退出时重启)、never(不重启)
+        - `desired_state`: 期望状态，running 或 stopped，由手动启动/停止设置，面板启动时会自动启动期望状态为 running 的客户端
+        - `restart_count`: 客户端异常退出后被自动重启的次数
+        - `crash_loop`: 是否因短时间内反复崩溃而降低了自动重启频率（每60秒重试一次），进程稳定运行或手动启动后恢复
     
     Returns:
         dict: 包含状态和信息的json, 格式为`{"status": "成功"|"失败", "message": "消息", "data": 数据, json格式, 如失败data为Nano}`
@@ -57,7 +84,7 @@ def list_programs() -> dict:
         with DataBase(database_path) as db:
             results = db.query_program()
             programs = [
-                {"id": row[0], "name": row[1], "description": row[2]}
+                {"id": row[0], "name": row[1], "description": row[2], "restart_policy": row[3], "desired_state": row[4]}
                 for row in results
             ]
     except Exception as e:
@@ -68,8 +95,8 @@ def list_programs() -> dict:
         }
     
     # 获取所有实例的运行状态信息
-    instance_status_list = manager.get_status()  # 例: [{"id": 1, "status": "运行"}, ...]
-    id_status_map = {str(item["id"]): item["status"] for item in instance_status_list}
+    instance_status_list = manager.get_status()  # 例: [{"id": 1, "status": "运行", ...}, ...]
+    id_status_map = {str(item["id"]): item for item in instance_status_list}
     
     # 运行过的id集合
     status_ids = set(id_status_map.keys())
@@ -77,9 +104,13 @@ def list_programs() -> dict:
         program_id_str = str(program["id"])
         # 若程序ID未出现在status列表中，标记为"未运行"
         if program_id_str in status_ids:
-            program["status"] = id_status_map[program_id_str]
+            program["status"] = id_status_map[program_id_str]["status"]
+            program["restart_count"] = id_status_map[program_id_str]["restart_count"]
+            program["crash_loop"] = id_status_map[program_id_str]["crash_loop"]
         else:
             program["status"] = "未运行"
+            program["restart_count"] = 0
+            program["crash_loop"] = False
     
     return {
         "status": "成功",
@@ -87,6 +118,42 @@ def list_programs() -> dict:
         "data": programs,
     }
 
+def boot_programs():
+    """面板启动时在后台启动所有期望状态为running的客户端
+
+    启动速率由 BOOT_CONCURRENCY 和 BOOT_STAGGER 控制。
+
+    Returns:
+        concurrent.futures.Future | None: 后台启动任务，读取客户端列表失败时为None
+    """
+    global manager, database_path
+    
+    try:
+        with DataBase(database_path) as db:
+            rows = db.query_program()
+    except Exception as e:
+        logger.warning(f"读取客户端列表失败, 不自动启动客户端: {str(e)}")
+        return None
+    
+    programs = [
+        (str(row[0]), f"data/cmd/{row[0]}/frpc", f"data/cmd/{row[0]}/frpc.toml", row[3])
+        for row in rows
+        if row[4] == "running"
+        and os.path.exists(f"data/cmd/{row[0]}/frpc")
+        and os.path.exists(f"data/cmd/{row[0]}/frpc.toml")
+    ]
+    if not programs:
+        return None
+    return submit(manager.boot(programs))
+
+def _set_desired_state(program_id: str, state: str):
+    """记录手动启动/停止后客户端的期望状态，失败时只记录日志"""
+    try:
+        with DataBase(database_path) as db:
+            db.update_program(int(program_id), desired_state=state)
+    except Exception as e:
+        logger.warning(f"保存客户端{program_id}的期望状态失败: {str(e)}")
+
 def delete_program(program_id: str) -> dict:
     """根据客户端ID删除客户端及其配置文件  
     
@@ -126,6 +193,7 @@ def delete_program(program_id: str) -> dict:
 
     # 数据库删除成功后，尝试删除目标目录
     cmd_dir = os.path.join("data", "cmd", str(program_id_int))
+    ConfigIndex().remove_client(str(program_id_int))
     try:
         if os.path.isdir(cmd_dir):
             shutil.rmtree(cmd_dir)
@@ -163,23 +231,32 @@ def start_program(program_id: str,) -> dict:
             "message": f"程序ID为{program_id}的FRPC配置文件不存在"
         }
     
-    for i in manager.get_status():
-        if i["id"] == program_id:
-            manager.get_instance(i["id"]).start() # type: ignore
-            return {
-                "status": "成功", 
-                "message": f"程序ID为{program_id}的程序已启动"
-            }
+    try:
+        with DataBase(database_path) as db:
+            program = db.query_program(program_id=int(program_id))
+        restart_policy = program[0][3] if program else DEFAULT_RESTART_POLICY
+    except Exception as e:
+        logger.warning(f"读取程序{program_id}的重启策略失败, 使用默认策略: {str(e)}")
+        restart_policy = DEFAULT_RESTART_POLICY
+    
     # 如果不在列表中, 先添加进列表，默认启动
-    manager.add_instance(
+    started = manager.ensure_started(
         id=program_id,
         frpc_path=f"data/cmd/{program_id}/frpc",
-        config_path=f"data/cmd/{program_id}/frpc.toml"
+        config_path=f"data/cmd/{program_id}/frpc.toml",
+        restart_policy=restart_policy
     )
+    if not started and not manager.get_instance(program_id).is_running(): # type: ignore
+        return {
+            "status": "失败", 
+            "message": f"程序ID为{program_id}的程序启动失败"
+        }
+    # 确认进程已启动后才记录期望状态，启动失败的客户端不会在面板重启后被自动启动
+    _set_desired_state(program_id, "running")
     
     return {
         "status": "成功", 
-        "message": f"程序ID为{program_id}的程序已启动"
+        "message": f"程序ID为{program_id}的程序已启动" if started else f"程序ID为{program_id}的程序已在运行"
     }
 
 async def stop_program(program_id: str,) -> dict:
@@ -193,19 +270,20 @@ async def stop_program(program_id: str,) -> dict:
     """
     global manager
     
-    for i in manager.get_status():
-        if i["id"] == program_id:
-            try:
-                await manager.get_instance(i["id"]).stop() # type: ignore
-                return {
-                    "status": "成功", 
-                    "message": f"程序ID为{program_id}的程序已停止"
-                }
-            except Exception as e:
-                return {
-                    "status": "失败", 
-                    "message": f"程序ID为{program_id}停止失败: {str(e)}"
-                }
+    _set_desired_state(program_id, "stopped")
+    frpc = manager.get_instance(program_id)
+    if frpc is not None:
+        try:
+            await frpc.stop()
+            return {
+                "status": "成功", 
+                "message": f"程序ID为{program_id}的程序已停止"
+            }
+        except Exception as e:
+            return {
+                "status": "失败", 
+                "message": f"程序ID为{program_id}停止失败: {str(e)}"
+            }
 
     return {
         "status": "成功", 
@@ -213,7 +291,12 @@ async def stop_program(program_id: str,) -> dict:
     }
 
 async def reload_program(program_id: str,) -> dict:
-    """根据程序ID热重载配置
+    """根据程序ID让修改后的配置生效
+
+    比较客户端进程正在使用的配置与配置文件，选择代价最小的方式：
+    - 配置没有变化：不做任何操作
+    - 只修改了隧道(proxies)、访问者(visitors)或start：通过webserver的/api/reload热重载，已有连接不受影响
+    - 修改了serverAddr、auth、transport、webServer、log等公共配置：frpc热重载不会应用这些修改，需要重启进程
 
     Args:
         program_id (str): 程序ID
@@ -224,13 +307,8 @@ async def reload_program(program_id: str,) -> dict:
     global manager
     
     # 检查程序是否正在运行
-    is_program_work = False
-    status = manager.get_status()
-    for i in status:
-        if i['id'] == program_id and i['status'] == "运行":
-            is_program_work = True
-            break
-    if not is_program_work:
+    frpc = manager.get_instance(program_id)
+    if frpc is None or not frpc.is_running():
         return {
             "status": "失败", 
             "message": f"程序 {program_id} 未运行"
@@ -252,25 +330,39 @@ async def reload_program(program_id: str,) -> dict:
             "message": f"无法读取配置文件: {str(e)}"
         }
     
-    is_have_web_config = config.webServer and \
-        config.webServer.addr and \
-        config.webServer.port and \
-        config.webServer.user and \
-        config.webServer.password
+    applied = frpc.applied_config
+    change = classify_config_change(applied, config)
+    if change == CHANGE_NONE:
+        return {"status": "成功", "message": "配置没有变化, 无需重载"}
     
-    if not is_have_web_config:
+    if change == CHANGE_RESTART:
+        try:
+            await frpc.stop()
+        except Exception as e:
+            return {
+                "status": "失败", 
+                "message": f"公共配置已修改需要重启, 但停止程序失败: {str(e)}"
+            }
+        if not manager.start_instance(program_id):
+            return {
+                "status": "失败", 
+                "message": f"公共配置已修改需要重启, 但程序ID为{program_id}的程序启动失败"
+            }
+        return {"status": "成功", "message": "公共配置已修改, 已重启客户端"}
+    
+    # 热重载请求发给正在运行的进程，它监听的是启动时配置中的webserver
+    target = webserver_target(applied or config, "/api/reload")
+    if target is None:
         return {
             "status": "失败", 
             "message": f"无法reload, 配置文件中webserver未配置, 该客户端{program_id}不支持热重载"
         }
-    else:
-        addr = config.webServer.addr # type: ignore
-        port = config.webServer.port # type: ignore
-        user = config.webServer.user # type: ignore
-        password = config.webServer.password # type: ignore
+    url, auth = target
     
     try:
-        response = requests.get(f"http://{addr}:{port}/api/reload", auth=(user, password)) # type: ignore
+        # 使用异步请求，批量重载时不会阻塞事件循环
+        async with httpx.AsyncClient(timeout=RELOAD_TIMEOUT) as client:
+            response = await client.get(url, auth=auth)
     except Exception as e:
         return {
             "status": "失败", 
@@ -284,6 +376,7 @@ async def reload_program(program_id: str,) -> dict:
             "message": f"使用frpc reload失败，错误码{response.status_code}, 内容：{response.text[:200].strip()}。"
         }
     
+    frpc.applied_config = config
     return {"status": "成功", "message": "重载成功"}    
 
 async def program_controller(program_id: str, action: str,):
@@ -293,7 +386,9 @@ async def program_controller(program_id: str, action: str,):
     - 启动(start)：创建并运行新的客户端实例
     - 停止(stop)：终止正在运行的客户端实例
     - 重启(restart)：先停止后启动客户端
-    - 热重载(reload)：在运行时更新配置
+    - 热重载(reload)：让修改后的配置生效，配置未变化时不做操作，只修改了隧道/访问者时热重载，修改了公共配置时重启
+
+    启动和停止（包括重启）会记录为客户端的期望状态，面板重启后会自动启动期望状态为运行的客户端。
 
     请求参数示例：
     ```json
@@ -377,6 +472,261 @@ async def program_controller(program_id: str, action: str,):
     if action == "reload":
         return await reload_program(program_id)
 
+async def bulk_program_controller(program_ids: str, action: str, concurrency: str = "") -> dict:
+    """批量控制多个FRPC客户端程序
+
+    对多个客户端并发执行同一个操作，每个客户端的处理方式与program_controller相同，
+    同时进行的操作数量不超过concurrency，返回每个客户端各自的结果。
+
+    program_ids 可以是：
+    - `all`: 全部客户端
+    - 逗号分隔的ID，例如 `1,2,5`
+    - json数组，例如 `["1", "2", "5"]`
+
+    返回值格式：
+    ```json
+    {
+        "status": "成功",
+        "message": "共3个客户端, 成功3个, 失败0个",
+        "data": [
+            {"program_id": "1", "status": "成功", "message": "程序ID为1的程序已启动"}
+        ]
+    }
+    ```
+    
+    - `status`: 全部客户端都成功时为成功，否则为失败
+    - `data`: 每个客户端的操作结果，顺序与传入的ID一致
+
+    Args:
+        program_ids (str): 客户端ID列表
+        action (str): 操作类型，可取值: ["start", "stop", "restart", "reload"]
+        concurrency (str): 最大并发数，不填时为16
+
+    Returns:
+        dict: 包含状态和信息的json, 格式为`{"status": "成功"|"失败", "message": "内容", "data": 每个客户端的结果}`
+    """
+    global database_path
+    
+    if action not in ACTION_LIST:
+        return {
+            "status": "失败",
+            "message": f"不支持的操作类型: {action}",
+            "data": None
+        }
+    
+    try:
+        limit = int(concurrency) if concurrency else BULK_ACTION_CONCURRENCY
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return {
+            "status": "失败",
+            "message": f"并发数{concurrency}格式错误, 需要是正整数",
+            "data": None
+        }
+    
+    program_ids = (program_ids or "").strip()
+    if program_ids.lower() == "all":
+        try:
+            with DataBase(database_path) as db:
+                ids = [str(row[0]) for row in db.query_program()]
+        except Exception as e:
+            return {
+                "status": "失败",
+                "message": f"数据库查询失败: {str(e)}",
+                "data": None
+            }
+    elif program_ids.startswith("["):
+        try:
+            ids = [str(i) for i in json.loads(program_ids)]
+        except (json.JSONDecodeError, TypeError) as e:
+            return {
+                "status": "失败",
+                "message": f"program_ids json解析失败: {str(e)}",
+                "data": None
+            }
+    else:
+        ids = [i.strip() for i in program_ids.split(",") if i.strip()]
+    # 去重并保持顺序
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return {
+            "status": "失败",
+            "message": "没有需要操作的客户端",
+            "data": None
+        }
+    
+    semaphore = asyncio.Semaphore(limit)
+    
+    async def run(program_id: str) -> dict:
+        async with semaphore:
+            try:
+                result = await program_controller(program_id, action)
+            except Exception as e:
+                logger.exception(f"批量{action}客户端{program_id}出错")
+                result = {"status": "失败", "message": f"操作出错: {str(e)}"}
+            return {"program_id": program_id, **result}
+    
+    started = time.monotonic()
+    results = await asyncio.gather(*(run(program_id) for program_id in ids))
+    failed = sum(1 for r in results if r["status"] != "成功")
+    logger.info(f"批量{action} {len(ids)}个客户端, 失败{failed}个, 耗时{time.monotonic() - started:.2f}秒")
+    
+    return {
+        "status": "成功" if failed == 0 else "失败",
+        "message": f"共{len(ids)}个客户端, 成功{len(ids) - failed}个, 失败{failed}个",
+        "data": results
+    }
+
+def set_restart_policy(program_id: str, policy: str) -> dict:
+    """设置客户端的重启策略
+
+    frpc进程在非手动停止的情况下退出时，面板会根据重启策略以指数退避的方式自动重启，
+    短时间内反复崩溃时改为每60秒重试一次。修改后立即生效，不需要重启客户端。
+    
+    - `always`: 进程退出后总是自动重启
+    - `on-failure`: 进程异常退出（退出码非0）时自动重启，默认策略
+    - `never`: 不自动重启
+
+    Args:
+        program_id (str): 客户端ID
+        policy (str): 重启策略，可取值: ["always", "on-failure", "never"]
+
+    Returns:
+        dict: 包含状态和信息的json, 格式为`{"status": "成功"|"失败", "message": "内容"}`
+    """
+    global manager, database_path
+    
+    try:
+        program_id_int = int(program_id)
+    except ValueError:
+        return {
+            "status": "失败",
+            "message": "客户端ID格式错误",
+        }
+    
+    if policy not in RESTART_POLICIES:
+        return {
+            "status": "失败",
+            "message": f"不支持的重启策略: {policy}, 可选: {list(RESTART_POLICIES)}",
+        }
+    
+    try:
+        with DataBase(database_path) as db:
+            success = db.update_program(program_id_int, restart_policy=policy)
+    except Exception as e:
+        return {
+            "status": "失败",
+            "message": f"数据库操作失败: {str(e)}"
+        }
+    if not success:
+        return {
+            "status": "失败",
+            "message": f"未找到ID为{program_id_int}的程序"
+        }
+    
+    manager.set_restart_policy(str(program_id_int), policy)
+    return {
+        "status": "成功",
+        "message": f"客户端{program_id_int}的重启策略已设置为{policy}"
+    }
+
+def query_program_logs(
+    program_id: str,
+    level: str = "",
+    proxy_name: str = "",
+    minutes: str = "",
+    keyword: str = "",
+    limit: str = "100",
+    ) -> dict:
+    """查询客户端最近的运行日志
+    
+    日志保存在内存中，只包含面板本次启动后客户端输出的日志。所有筛选条件均可留空。
+    
+    请求示例：查询客户端1中隧道ssh最近5分钟的错误日志
+    - program_id = "1"
+    - level = "error"
+    - proxy_name = "ssh"
+    - minutes = "5"
+    
+    返回的格式为：
+    ```json
+    {
+        "status": "成功",
+        "message": "查询日志成功",
+        "data": [
+            {
+                "time": "2025-01-01 12:00:00",
+                "level": "error",
+                "proxy": "ssh",
+                "message": "start error: port already used"
+            }
+        ]
+    }
+    ```
+    
+    - `status`: 操作状态，成功或失败
+    - `message`: 操作信息
+    - `data`: 日志列表，按时间从旧到新排列，每个元素包含以下
+        - `time`: 日志时间
+        - `level`: 日志级别，trace、debug、info、warn、error，无法识别的日志为null
+        - `proxy`: 日志关联的隧道名，没有时为null
+        - `message`: 日志内容
+    
+    Args:
+        program_id (str): 客户端ID
+        level (str): 最低日志级别，可取值: ["trace", "debug", "info", "warn", "error"]，例如warn会返回warn和error
+        proxy_name (str): 隧道名称
+        minutes (str): 只查询最近多少分钟的日志
+        keyword (str): 日志内容中包含的关键字
+        limit (str): 最多返回的条数，默认100，返回最新的日志
+
+    Returns:
+        dict: 包含状态和信息的json, 格式为`{"status": "成功"|"失败", "message": "消息", "data": 数据, 如失败data为None}`
+    """
+    global manager
+    
+    program_id = str(program_id)
+    frpc = manager.get_instance(program_id)
+    if frpc is None:
+        return {
+            "status": "失败",
+            "message": f"客户端{program_id}在面板启动后没有运行过，没有日志",
+            "data": None
+        }
+    
+    try:
+        since = time.time() - float(minutes) * 60 if minutes else None
+        limit_int = int(limit) if limit else 100
+        records = frpc.log_records.query(
+            level=level or None,
+            proxy=proxy_name or None,
+            since=since,
+            keyword=keyword or None,
+            limit=limit_int,
+        )
+    except ValueError as e:
+        return {
+            "status": "失败",
+            "message": f"查询参数错误: {str(e)}",
+            "data": None
+        }
+    
+    data = [
+        {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r["time"])),
+            "level": r["level"],
+            "proxy": r["proxy"],
+            "message": r["message"],
+        }
+        for r in records
+    ]
+    return {
+        "status": "成功",
+        "message": "查询日志成功",
+        "data": data
+    }
+
 def new_program(tab_var):
     """上传program的gradio界面"""
 
@@ -446,7 +796,11 @@ def new_program(tab_var):
     btn.click(fn=submit, inputs=[file_input, name, description], show_api=False)
 
 async def watch_log(program_name: str):
-    """查看程序日志"""
+    """查看程序日志
+    
+    持续跟踪日志文件: 记录已读取的字节偏移, 每次只转换并输出新追加的行,
+    日志轮转后自动切换到新文件。客户端断开或程序停止后结束。
+    """
     from ansi2html import Ansi2HTMLConverter
     WARNING_TEMPLATE = (
     "<p style='color: #856404; background-color: #fff3cd;"
@@ -455,6 +809,10 @@ async def watch_log(program_name: str):
     f"<strong>{_('注意')}：</strong> %s" # 注意：f格式化字符串会导致无法动态切换语言
     "</p>"
     )
+    LOG_TEMPLATE = (
+    "<pre style='white-space: pre-wrap; word-wrap: break-word;"
+    " color: #AAAAAA; background-color: #000000; margin: 0;'>%s</pre>"
+    )
     program_list = list_programs()
     if not program_list["status"] == "成功":
         logger.error(f"获取程序列表数据错误，错误：{program_list['message']}")
@@ -467,13 +825,11 @@ async def watch_log(program_name: str):
     
     program_id = program_name_id_map[program_name]
     
-    is_running = False
-    for program in program_list:
-        if program_id == str(program['id']) and program['status'] == "运行":
-            is_running = True
-    not_running_msg = None
-    if not is_running:
-        not_running_msg = _("程序%s未在运行，输出的日志可能过时") % program_name
+    def is_running():
+        frpc = manager.get_instance(program_id)
+        return bool(frpc and frpc.is_running())
+    
+    not_running_msg = _("程序%s未在运行，输出的日志可能过时") % program_name
     
     log_file = f"data/cmd/{program_id}/log.log"
     
@@ -487,11 +843,51 @@ async def watch_log(program_name: str):
             count += 1
         await asyncio.sleep(0.1)
     
-    with open(log_file, "r") as f:
-        conv = Ansi2HTMLConverter(inline=True)
-        f.seek(0)
-        content = f.read()
-        html = conv.convert(content)
-        if not_running_msg:
+    conv = Ansi2HTMLConverter(inline=True)
+    html_lines = deque(maxlen=WATCH_LOG_MAX_LINES)
+    
+    def render(running: bool) -> str:
+        html = LOG_TEMPLATE % "".join(html_lines)
+        if not running:
             html += WARNING_TEMPLATE % not_running_msg
-        yield html
+        return html
+    
+    def consume(data: bytes) -> bytes:
+        """转换完整的行, 返回末尾不完整的部分"""
+        *lines, rest = data.split(b"\n")
+        for line in lines:
+            html_lines.append(conv.convert(line.decode("utf-8", errors="replace") + "\n", full=False))
+        return rest
+    
+    f = open(log_file, "rb")
+    try:
+        # 首次只读取文件末尾的一部分
+        size = os.fstat(f.fileno()).st_size
+        if size > WATCH_LOG_INITIAL_BYTES:
+            f.seek(size - WATCH_LOG_INITIAL_BYTES)
+            f.readline() # 丢弃不完整的第一行
+        pending = consume(f.read())
+        running = is_running()
+        yield render(running)
+        
+        while running:
+            await asyncio.sleep(WATCH_LOG_INTERVAL)
+            data = f.read()
+            # 日志已轮转: 读完旧文件剩余内容后切换到新文件
+            try:
+                st = os.stat(log_file)
+                rotated = st.st_ino != os.fstat(f.fileno()).st_ino or st.st_size < f.tell()
+            except FileNotFoundError:
+                rotated = False
+            if rotated:
+                data += f.read()
+                f.close()
+                f = open(log_file, "rb")
+                data += f.read()
+            running = is_running()
+            if data:
+                pending = consume(pending + data)
+            if data or not running:
+                yield render(running)
+    finally:
+        f.close()
@@ -2,12 +2,14 @@ import json
 import logging
 from math import e
 import os
-from typing import Dict, List, Type
-from entity.proxy import HTTPProxyConfig, HTTPSProxyConfig, STCPProxyConfig, SUDPProxyConfig, TCPMuxProxyConfig, TCPProxyConfig, UDPProxyConfig, XTCPProxyConfig
-from utils.ConfigManager import ConfigManager
+import time
+from entity.proxy import PROXY_TYPE_MAP
+from utils.ConfigManager import ConfigManager, fsync_batch
+from utils.config_index import ConfigIndex, proxy_claims
 from utils.database import DataBase
+from gradio_mcp.programs import reload_program
 from utils.program_manager import ProgramManager
-import requests
+from utils.status_collector import collect_status, webserver_target
 
 # 临时配置文件地址
 database_path = "data/data.db"
@@ -15,115 +17,84 @@ database_path = "data/data.db"
 logger = logging.getLogger("gradio_mcp.proxies")
 manager = ProgramManager()
 
-PROXY_TYPE_MAP: Dict[str, Type] = {
-    'tcp': TCPProxyConfig,
-    'udp': UDPProxyConfig,
-    'http': HTTPProxyConfig,
-    'https': HTTPSProxyConfig,
-    'stcp': STCPProxyConfig,
-    'sudp': SUDPProxyConfig,
-    'xtcp': XTCPProxyConfig,
-    'tcpmux': TCPMuxProxyConfig,
-}
-
-def check_proxy_status(ids: List[str] | None = None) -> dict:
-    # 从数据库得到一个可信的id列表
-    try:
-        with DataBase(database_path) as db:
-            results = db.query_program()
-            db_id = [str(result[0]) for result in results]
-    except Exception as e:
-        return {
-            "status": "失败",
-            "message": f"数据库查询失败: {str(e)}",
-            "data": None
-        }
-    # TODO: 检查start列表
-    if not ids:
-        ids = db_id
-    if len(ids) == 0:
-        return {
-            "status": "失败",
-            "message": f"传入的id列表为空",
-            "data": None
-        }
-    proxy_status = {}
-    # 处理列表中的客户端
-    for id in ids:
-        if id not in db_id:
-            logger.warning(f"check_proxy_status: id{id}不在数据库中，跳过检测")
-            continue
-        
-        if os.path.exists(f"data/cmd/{id}") and os.path.isfile(f"data/cmd/{id}/frpc.toml"):
-            try:
-                cfg = ConfigManager(f"data/cmd/{id}/frpc.toml").load_config()
-            except Exception as e:
-                logger.warning(f"check_proxy_status: id{id}加载配置文件出错: {str(e)}, 跳过检测")
-                continue
-        else:
-            logger.warning(f"check_proxy_status: id{id}未找到配置文件, 跳过检测")
-            continue
-        
-        is_program_work = False
-        status = manager.get_status()
-        for i in status:
-            if i['id'] == id and i['status'] == "运行":
-                is_program_work = True
-                break
-        if not is_program_work:
-            if cfg.proxies:
-                program_proxies_status = {}
-                for proxy in cfg.proxies:
-                    program_proxies_status[proxy.name] = "停止"
-            proxy_status[id] = program_proxies_status
-            continue
-        
-        is_have_web_config = cfg.webServer and \
-            cfg.webServer.addr and \
-            cfg.webServer.port and \
-            cfg.webServer.user and \
-            cfg.webServer.password
-
-        if not is_have_web_config:
-            logger.warning(f"check_proxy_status: id{id}没有配置webserver, 跳过检测")
-            continue
-        else:
-            addr = cfg.webServer.addr # type: ignore
-            port = cfg.webServer.port # type: ignore
-            user = cfg.webServer.user # type: ignore
-            password = cfg.webServer.password # type: ignore
+# 状态快照超过 轮询间隔*该系数 后视为过期，需要重新请求
+STATUS_SNAPSHOT_MAX_AGE_FACTOR = 3
 
-        try:
-            response = requests.get(f"http://{addr}:{port}/api/status", auth=(user, password)) # type: ignore
-        except Exception as e:
-            logger.warning(f"请求客户端{id}的webserver失败, 错误：{str(e)}，跳过检测")
-            continue
-        
-        if response.status_code != 200:
-            logger.warning(f"请求客户端{id}的webserver失败，错误码{response.status_code}, 内容：{response.text[:200].strip()}。跳过检测")
-            continue
-        
-        # 解析响应为json
-        try:
-            data = response.json()
-        except json.JSONDecodeError as e:
-            logger.warning(f"请求客户端{id}的webserver失败，错误：{str(e)}，跳过检测")
-            continue
-        
-        program_proxies_status = {}
+def _format_timestamp(ts: float | None) -> str | None:
+    """把时间戳格式化为本地时间字符串"""
+    if ts is None:
+        return None
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+
+def _parse_proxy_status(cfg, snapshot: dict) -> dict:
+    """根据webserver状态快照计算客户端下每条隧道的状态"""
+    program_proxies_status = {}
+    if snapshot["state"] == "timeout":
+        return {proxy.name: "超时" for proxy in (cfg.proxies or [])}
+    if snapshot["state"] == "ok":
+        data = snapshot["data"]
         for i in data.keys():
             for i in data[i]:
                 if i["status"] == "running":
                     program_proxies_status[i["name"]] = "运行"
                 else:
                     program_proxies_status[i["name"]] = "错误"
+    
+    if cfg.proxies:
+        for proxy in cfg.proxies:
+            if proxy.name not in program_proxies_status.keys():
+                program_proxies_status[proxy.name] = "未知"
+    return program_proxies_status
+
+def _collect_proxy_status(configs: dict) -> dict:
+    """汇总多个客户端的隧道状态
+    
+    运行中的客户端优先使用后台轮询得到的状态快照，没有快照或快照过期时
+    才会并发请求这些客户端的webserver。请求失败的快照同样直接使用，
+    失败的客户端由后台轮询按退避间隔重试，不会让每次查询都等待超时。
+    
+    Args:
+        configs (dict): 客户端ID -> 已加载的ClientConfig
+    
+    Returns:
+        dict: 客户端ID -> `{"proxies": {隧道名: 状态}, "last_updated": 时间戳或None}`
+    """
+    running_ids = {i['id'] for i in manager.get_status() if i['status'] == "运行"}
+    max_age = manager.status_poll_interval * STATUS_SNAPSHOT_MAX_AGE_FACTOR
+    now = time.time()
+    
+    proxy_status = {}
+    targets = {}
+    for id, cfg in configs.items():
+        if id not in running_ids:
+            proxy_status[id] = {
+                "proxies": {proxy.name: "停止" for proxy in (cfg.proxies or [])},
+                "last_updated": None,
+            }
+            continue
         
-        if cfg.proxies:
-            for proxy in cfg.proxies:
-                if proxy.name not in program_proxies_status.keys():
-                    program_proxies_status[proxy.name] = "未知"
-        proxy_status[id] = program_proxies_status
+        snapshot = manager.get_status_snapshot(id)
+        if snapshot and now - snapshot["last_updated"] <= max_age:
+            proxy_status[id] = {
+                "proxies": _parse_proxy_status(cfg, snapshot),
+                "last_updated": snapshot["last_updated"],
+            }
+            continue
+        
+        target = webserver_target(cfg)
+        if not target:
+            logger.warning(f"id{id}没有配置webserver, 跳过状态检测")
+            continue
+        targets[id] = target
     
+    # 并发请求没有可用快照的客户端，并把结果写回快照
+    for id, result in collect_status(targets).items():
+        manager.update_status_snapshot(id, result)
+        snapshot = manager.get_status_snapshot(id)
+        proxy_status[id] = {
+            "proxies": _parse_proxy_status(configs[id], snapshot), # type: ignore
+            "last_updated": snapshot["last_updated"], # type: ignore
+        }
     return proxy_status
 
 def get_all_proxies():
@@ -141,7 +112,9 @@ def get_all_proxies():
                 "type": "tcp",
                 "localIp": "10.0.0.1",
                 "localPort": 22,
-                "remotePort": 1022
+                "remotePort": 1022,
+                "status": "运行",
+                "last_updated": "2025-01-01 12:00:00"
             }
         ]
     }
@@ -156,6 +129,8 @@ def get_all_proxies():
         - `localIp`: 本地IP地址
         - `localPort`: 本地端口
         - `remotePort`: 远程端口
+        - `status`: 隧道状态，运行、错误、停止、超时或未知
+        - `last_updated`: 隧道状态的更新时间，客户端未运行时为null
     
     Returns:
         dict: 包含状态和信息的json, 格式为`{"status": "成功"|"失败", "message": "消息", "data": 数据, json格式, 如失败data为None}`
@@ -181,58 +156,40 @@ def get_all_proxies():
     }
     
     all_proxies = []
-    # 得到data/cmd/下的文件夹
     cmd_path = os.path.join("data", "cmd")
-    if not os.path.exists(cmd_path):
-        return {
-        "status": "成功",
-        "message": "获取所有隧道成功",
-        "data": []
-    }
-    
-    try:
-        folder_names = [f for f in os.listdir(cmd_path) if os.path.isdir(os.path.join(cmd_path, f))]
-    except OSError as e:
-        return {
-            "status": "成功",
-            "message": f"无法读取配置文件夹: {str(e)}",
-            "data": None
-        }
     
-    for folder_name in folder_names:
-        # 验证文件夹名在不在db id, 如不在，跳过
-        if folder_name not in db_id:
-            # TODO: log
-            continue
-        
-        # 验证文件夹下有没有frpc.toml, 如没有，跳过
-        config_path = os.path.join(cmd_path, folder_name, "frpc.toml")
-        if not os.path.exists(config_path):
-            # TODO: log
+    # 每个客户端的配置只加载一次
+    configs = {}
+    for program_id in db_id:
+        # 验证客户端下有没有frpc.toml, 如没有，跳过
+        config_path = os.path.join(cmd_path, program_id, "frpc.toml")
+        if not os.path.isfile(config_path):
             continue
         
         # 加载config, 如果错误，跳过
         try:
-            client_config_manager = ConfigManager(config_path)
-            client_config = client_config_manager.load_config()
-        except Exception:
-            # TODO: log
+            client_config = ConfigManager(config_path).load_config()
+        except Exception as e:
+            logger.warning(f"get_all_proxies: 客户端{program_id}加载配置文件出错: {str(e)}, 已跳过")
             continue
         
         # 检查config.proxies是否为空, 如为空，跳过
         if not client_config.proxies:
             continue
-        
-        proxy_status = check_proxy_status([folder_name])
-        
+        configs[program_id] = client_config
+    
+    # 一次性汇总所有客户端的隧道状态
+    proxy_status = _collect_proxy_status(configs)
+    
+    for program_id, client_config in configs.items():
+        status = proxy_status.get(program_id, {"proxies": {}, "last_updated": None})
+        last_updated = _format_timestamp(status["last_updated"])
         # 读取每一条proxy，添加上program_id, 值为cid
-        for proxy in client_config.proxies:
+        for proxy in client_config.proxies: # type: ignore
             proxy_dict = proxy.model_dump(by_alias=True, exclude_none=True)
-            proxy_dict["program_id"] = int(folder_name)
-            if len(proxy_status) > 0:
-                proxy_dict["status"] = proxy_status[folder_name][proxy.name]
-            else:
-                proxy_dict["status"] = "未知"
+            proxy_dict["program_id"] = int(program_id)
+            proxy_dict["status"] = status["proxies"].get(proxy.name, "未知")
+            proxy_dict["last_updated"] = last_updated
             # 添加到all_proxies
             all_proxies.append(proxy_dict)
     
@@ -290,8 +247,7 @@ def get_proxy_by_program_id(program_id: str) -> dict:
     # 从数据库得到一个可信的id列表
     try:
         with DataBase(database_path) as db:
-            results = db.query_program()
-            db_id = [str(result[0]) for result in results]
+            db_id = db.program_ids()
     except Exception as e:
         return {
             "status": "成功",
@@ -375,8 +331,7 @@ def get_proxy_by_name(
     # 从数据库得到一个可信的id列表
     try:
         with DataBase(database_path) as db:
-            results = db.query_program()
-            db_id = [str(result[0]) for result in results]
+            db_id = db.program_ids()
     except Exception as e:
         return {
             "status": "成功",
@@ -455,8 +410,7 @@ def new_proxy(program_id: str, data: str) -> dict:
     # 从数据库得到一个可信的id列表
     try:
         with DataBase(database_path) as db:
-            results = db.query_program()
-            db_id = [str(result[0]) for result in results]
+            db_id = db.program_ids()
     except Exception as e:
         return {
             "status": "成功",
@@ -511,43 +465,19 @@ def new_proxy(program_id: str, data: str) -> dict:
     if not config.proxies:
         config.proxies = []
     
-    for i in config.proxies:
-        # 检测名字是否重名，也许事应该前端也做一遍？
-        if i.name == new_proxy_config.name:
-            return {
-                "status": "失败",
-                "message": f"名字{new_proxy_config.name}已经被占用",
-            }
-        # 检测tcp, udp端口是否重复
-        if data_dict["type"] in ['tcp', 'udp'] and i.type_ in ['tcp', 'udp']:
-            if new_proxy_config.remotePort == None:
-                return {
-                    "status": "失败",
-                    "message": "remotePort为空,不支持这样的写法",
-                }
-            if i.remotePort == None: # type: ignore
-                continue
-            if i.remotePort == new_proxy_config.remotePort:  # type: ignore
-                return {
-                    "status": "失败",
-                    "message": f"端口{new_proxy_config.remotePort}已经被占用",
-                }
-        # 检测http, https绑定域名是否重复
-        if data_dict["type"] in ['http', 'https'] and i.type_ in ['http', 'https']:
-            if i.customDomains == None: # type: ignore
-                continue
-            if new_proxy_config.customDomains == None:
-                return {
-                    "status": "失败",
-                    "message": "customDomains为空,不支持这样的写法",
-                }
-            for domain in i.customDomains: # type: ignore
-                for domain2 in new_proxy_config.customDomains: # type: ignore
-                    if domain == domain2:
-                        return {
-                            "status": "失败",
-                            "message": f"域名{domain2}已经被{i.name}占用",
-                        }
+    if data_dict["type"] in ['tcp', 'udp'] and new_proxy_config.remotePort == None: # type: ignore
+        return {
+            "status": "失败",
+            "message": "remotePort为空,不支持这样的写法",
+        }
+    
+    # 检测名字、tcp/udp端口、http/https域名是否与同一frps服务端下的隧道冲突
+    conflict = ConfigIndex().check_proxy_conflict(program_id, config, new_proxy_config)
+    if conflict:
+        return {
+            "status": "失败",
+            "message": conflict,
+        }
     # 添加隧道到配置文件
     config.proxies.append(new_proxy_config)
     config_manager.save_config(config)
@@ -595,8 +525,7 @@ def update_proxy_by_name(program_id: str, data: str) -> dict:
     # 从数据库得到一个可信的id列表
     try:
         with DataBase(database_path) as db:
-            results = db.query_program()
-            db_id = [str(result[0]) for result in results]
+            db_id = db.program_ids()
     except Exception as e:
         return {
             "status": "成功",
@@ -681,32 +610,13 @@ def update_proxy_by_name(program_id: str, data: str) -> dict:
             "message": f"数据格式错误, 错误内容：{str(e)}",
         }
     
-    # 唯一性检查（跳过自身）
-    for i, other in enumerate(config.proxies):
-        if i == target_index:
-            continue
-        # 名称冲突
-        if updated_proxy.name == other.name:
-            return {
-                "status": "失败",
-                "message": f"名字{updated_proxy.name}已经被占用",
-            }
-        # tcp/udp 端口冲突
-        if old_proxy.type_ in ['tcp', 'udp'] and other.type_ in ['tcp', 'udp']:
-            if updated_proxy.remotePort and other.remotePort == updated_proxy.remotePort: # type: ignore
-                return {
-                    "status": "失败",
-                    "message": f"端口{updated_proxy.remotePort}已经被占用",
-                }
-        # http/https 域名冲突
-        if old_proxy.type_ in ['http', 'https'] and other.type_ in ['http', 'https']:
-            if updated_proxy.customDomains:
-                for d in updated_proxy.customDomains:
-                    if other.customDomains and d in other.customDomains: # type: ignore
-                        return {
-                                "status": "失败",
-                                "message": f"域名{d}已经被{other.name}占用",
-                            }
+    # 唯一性检查（跳过自身），范围为同一frps服务端下的全部客户端
+    conflict = ConfigIndex().check_proxy_conflict(program_id, config, updated_proxy, replace_name=old_proxy.name)
+    if conflict:
+        return {
+            "status": "失败",
+            "message": conflict,
+        }
 
     # 应用更新并保存
     config.proxies[target_index] = updated_proxy
@@ -740,8 +650,7 @@ def delete_proxy_by_name(program_id: str, proxy_name: str) -> dict:
     # 从数据库得到一个可信的id列表
     try:
         with DataBase(database_path) as db:
-            results = db.query_program()
-            db_id = [str(result[0]) for result in results]
+            db_id = db.program_ids()
     except Exception as e:
         return {
             "status": "成功",
@@ -788,4 +697,320 @@ def delete_proxy_by_name(program_id: str, proxy_name: str) -> dict:
     return {
         "status": "成功", 
         "message": f"成功删除隧道 {proxy_name}"
-    }
\ No newline at end of file
+    }
+def search_proxies(name: str = "", port: str = "", domain: str = "") -> dict:
+    """跨客户端搜索隧道和观察者
+
+    三个条件至少填写一个，同时填写时返回同时满足全部条件的结果：
+    - `name`: 隧道或观察者名称，精确匹配
+    - `port`: 端口，匹配隧道的remotePort或观察者的bindPort
+    - `domain`: 域名，匹配隧道的customDomains
+    
+    返回的格式为：
+    ```json
+    {
+        "status": "成功",
+        "message": "搜索完成, 共1条结果",
+        "data": [
+            {
+                "client_id": "1",
+                "kind": "proxy",
+                "name": "ssh-t4",
+                "type": "tcp",
+                "server": "1.2.3.4:7000",
+                "remotePort": 1022,
+                "customDomains": []
+            }
+        ]
+    }
+    ```
+    
+    - `client_id`: 所在客户端ID
+    - `kind`: proxy(隧道)或visitor(观察者)
+    - `server`: 客户端连接的frps服务端地址
+    - 观察者没有remotePort和customDomains, 而是包含`serverName`、`bindAddr`和`bindPort`
+    
+    Args:
+        name (str): 名称
+        port (str): 端口
+        domain (str): 域名
+
+    Returns:
+        dict: 包含状态和信息的json, 格式为`{"status": "成功"|"失败", "message": "消息", "data": 数据, json格式, 如失败data为None}`
+    """
+    if not name and not port and not domain:
+        return {
+            "status": "失败",
+            "message": "name、port、domain至少需要填写一个",
+            "data": None
+        }
+    
+    port_int = None
+    if port:
+        try:
+            port_int = int(port)
+        except ValueError:
+            return {
+                "status": "失败",
+                "message": f"端口{port}格式错误",
+                "data": None
+            }
+    
+    index = ConfigIndex()
+    candidates = []
+    if name:
+        candidates.append(index.find_by_name(name))
+    if port_int is not None:
+        candidates.append(index.find_by_remote_port(port_int) + index.find_by_bind_port(port_int))
+    if domain:
+        candidates.append(index.find_by_domain(domain))
+    
+    # 取各条件结果的交集
+    def entry_key(entry):
+        return (entry["client_id"], entry["kind"], entry["name"])
+    keys = set.intersection(*[{entry_key(e) for e in c} for c in candidates])
+    data = [e for e in candidates[0] if entry_key(e) in keys]
+    data.sort(key=lambda e: (e["client_id"], e["kind"], e["name"]))
+    
+    return {
+        "status": "成功",
+        "message": f"搜索完成, 共{len(data)}条结果",
+        "data": data
+    }
+
+def _apply_proxy_operation(op: dict, client_id: str, config, index: ConfigIndex, released: set, claims: dict, claims_by_proxy: dict) -> str:
+    """
+    在客户端配置的工作副本上执行一条批量操作，返回成功信息
+
+    released 记录本批次中被删除或替换的原有隧道，claims 记录本批次新增隧道占用的资源，
+    两者一起保证批次内的操作之间以及与其它客户端之间都不冲突。
+
+    Raises:
+        ValueError: 操作不合法或发生冲突
+    """
+    action = op.get("action")
+    if action == "delete":
+        name = op.get("name") or (op.get("data") or {}).get("name")
+        if not name:
+            raise ValueError("缺少name字段")
+        for idx, proxy in enumerate(config.proxies):
+            if proxy.name == name:
+                del config.proxies[idx]
+                break
+        else:
+            raise ValueError(f"客户端{client_id}下找不到隧道{name}")
+        released.add((client_id, name))
+        for key in claims_by_proxy.pop((client_id, name), []):
+            claims.pop(key, None)
+        return f"成功删除隧道 {name}"
+    
+    data_dict = op.get("data")
+    if not isinstance(data_dict, dict):
+        raise ValueError("缺少data字段")
+    if "name" not in data_dict:
+        raise ValueError("请求体中缺少name字段")
+    
+    if action == "create":
+        if data_dict.get("type") not in PROXY_TYPE_MAP:
+            raise ValueError(f"类型{data_dict.get('type')}不是一个有效的类型")
+        try:
+            proxy = PROXY_TYPE_MAP[data_dict["type"]](**data_dict)
+        except Exception as e:
+            raise ValueError(f"配置文件格式不正确: {str(e)}")
+        if proxy.type_ in ['tcp', 'udp'] and proxy.remotePort == None: # type: ignore
+            raise ValueError("remotePort为空,不支持这样的写法")
+        target_index = None
+        replace_name = None
+    elif action == "update":
+        for target_index, old_proxy in enumerate(config.proxies):
+            if old_proxy.name == data_dict["name"]:
+                break
+        else:
+            raise ValueError(f"客户端{client_id}下找不到{data_dict['name']}隧道")
+        if "type" in data_dict and data_dict["type"] != old_proxy.type_:
+            raise ValueError(f"不支持修改隧道类型, 旧隧道为: {old_proxy.type_}, 新隧道为: {data_dict['type']}")
+        merged = old_proxy.model_dump(by_alias=True)
+        merged.update(data_dict)
+        try:
+            proxy = PROXY_TYPE_MAP[old_proxy.type_](**merged)
+        except Exception as e:
+            raise ValueError(f"数据格式错误, 错误内容：{str(e)}")
+        replace_name = old_proxy.name
+    else:
+        raise ValueError(f"不支持的操作{action}, 只支持create、update和delete")
+    
+    # 先释放被替换的隧道在本批次中的占用，再检查冲突
+    own_claims = claims_by_proxy.pop((client_id, proxy.name), [])
+    for key in own_claims:
+        claims.pop(key, None)
+    conflict = index.check_proxy_conflict(client_id, config, proxy, replace_name=replace_name, released=released, sync=False)
+    if conflict is None:
+        new_claims = proxy_claims(config, proxy)
+        for key, desc in new_claims:
+            owner = claims.get(key)
+            if owner is not None:
+                conflict = f"{desc}已经被本批次中客户端{owner[0]}的{owner[1]}占用"
+                break
+    if conflict:
+        raise ValueError(conflict)
+    for key, _desc in new_claims:
+        claims[key] = (client_id, proxy.name)
+    claims_by_proxy[(client_id, proxy.name)] = [key for key, _desc in new_claims]
+    
+    if target_index is None:
+        config.proxies.append(proxy)
+        return f"隧道 {proxy.name} 创建成功"
+    released.add((client_id, replace_name))
+    config.proxies[target_index] = proxy
+    return f"隧道 {proxy.name} 修改成功"
+
+async def batch_proxy_operations(operations: str, reload: str = "false") -> dict:
+    """批量新建、修改、删除隧道
+
+    一批操作要么全部成功，要么全部不生效。每个涉及的客户端的配置文件只读取和写入一次，
+    冲突检查的范围与new_proxy相同，并且会检查同一批次内的操作之间是否冲突。
+
+    数据(operations参数)的格式：  
+    ```json
+    [
+        {"action": "create", "program_id": "1", "data": {"name": "ssh-t4", "type": "tcp", "localIp": "10.0.0.1", "localPort": 22, "remotePort": 1022}},
+        {"action": "update", "program_id": "1", "data": {"name": "web", "type": "http", "localPort": 8080}},
+        {"action": "delete", "program_id": "2", "name": "old-ssh"}
+    ]
+    ```
+    
+    - `action`: 操作类型，create(新建)、update(修改)或delete(删除)
+    - `program_id`: 客户端ID
+    - `data`: 隧道数据，格式与new_proxy和update_proxy_by_name相同，修改时name用于查找隧道，type不支持修改
+    - `name`: 删除时使用，要删除的隧道名
+    
+    返回的格式为：
+    ```json
+    {
+        "status": "成功",
+        "message": "批量操作成功, 共3条",
+        "data": {
+            "operations": [
+                {"index": 0, "program_id": "1", "status": "成功", "message": "隧道 ssh-t4 创建成功"}
+            ],
+            "reload": [
+                {"program_id": "1", "status": "成功", "message": "重载成功"}
+            ]
+        }
+    }
+    ```
+    
+    - `operations`: 每条操作的结果，失败时所有操作都不会生效
+    - `reload`: 每个客户端的重载结果，reload为false或操作失败时为空
+    
+    注意: 删除操作会丢失数据，使用前一定要得到用户的肯定!
+    
+    Args:
+        operations (str): 操作列表json字符串
+        reload (str): 操作完成后是否重载涉及的客户端，"true"或"false"，默认为"false"
+
+    Returns:
+        dict: 包含状态和信息的json, 格式为`{"status": "成功"|"失败", "message": "消息", "data": 数据}`
+    """
+    try:
+        ops = json.loads(operations)
+    except json.JSONDecodeError as e:
+        return {
+            "status": "失败",
+            "message": f"operations json解析失败, 错误内容：{str(e)}",
+            "data": None
+        }
+    if not isinstance(ops, list) or not ops:
+        return {
+            "status": "失败",
+            "message": "operations必须是非空的json数组",
+            "data": None
+        }
+    
+    # 从数据库得到一个可信的id列表
+    try:
+        with DataBase(database_path) as db:
+            db_id = db.program_ids()
+    except Exception as e:
+        return {
+            "status": "失败",
+            "message": f"数据库查询失败: {str(e)}",
+            "data": None
+        }
+    
+    index = ConfigIndex()
+    managers = {}
+    originals = {}
+    configs = {}
+    released = set()
+    claims = {}
+    claims_by_proxy = {}
+    results = []
+    failed = False
+    for i, op in enumerate(ops):
+        program_id = str(op.get("program_id", "")) if isinstance(op, dict) else ""
+        result = {"index": i, "program_id": program_id}
+        results.append(result)
+        if failed:
+            result.update({"status": "失败", "message": "前面的操作失败, 未执行"})
+            continue
+        try:
+            if not isinstance(op, dict):
+                raise ValueError("操作必须是json对象")
+            if program_id not in db_id:
+                raise ValueError(f"客户端{program_id}不存在")
+            if program_id not in configs:
+                config_path = f"data/cmd/{program_id}/frpc.toml"
+                if not os.path.isfile(config_path):
+                    raise ValueError(f"客户端{program_id}对应的frpc配置文件不存在")
+                managers[program_id] = ConfigManager(config_path)
+                originals[program_id] = managers[program_id].load_config()
+                index.sync_client(program_id, originals[program_id])
+                configs[program_id] = originals[program_id].model_copy(deep=True)
+                if not configs[program_id].proxies:
+                    configs[program_id].proxies = []
+            message = _apply_proxy_operation(
+                op, program_id, configs[program_id], index, released, claims, claims_by_proxy
+            )
+            result.update({"status": "成功", "message": message})
+        except Exception as e:
+            failed = True
+            result.update({"status": "失败", "message": str(e)})
+    
+    if failed:
+        return {
+            "status": "失败",
+            "message": "批量操作校验失败, 所有操作均未生效",
+            "data": {"operations": results, "reload": []}
+        }
+    
+    # 每个客户端只写一次，任何一个写入失败都把已写入的客户端恢复原样
+    saved = []
+    try:
+        with fsync_batch():
+            for program_id, config in configs.items():
+                managers[program_id].save_config(config)
+                saved.append(program_id)
+    except Exception as e:
+        for program_id in saved:
+            try:
+                managers[program_id].save_config(originals[program_id])
+            except Exception as restore_error:
+                logger.error(f"batch_proxy_operations: 恢复客户端{program_id}配置失败: {str(restore_error)}")
+        return {
+            "status": "失败",
+            "message": f"保存配置失败, 已撤销本批次的修改: {str(e)}",
+            "data": {"operations": results, "reload": []}
+        }
+    
+    reload_results = []
+    if str(reload).strip().lower() in ("true", "1", "yes"):
+        for program_id in configs:
+            reload_result = await reload_program(program_id)
+            reload_results.append({"program_id": program_id, **reload_result})
+    
+    return {
+        "status": "成功",
+        "message": f"批量操作成功, 共{len(results)}条",
+        "data": {"operations": results, "reload": reload_results}
+    }
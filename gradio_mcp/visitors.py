@@ -1,19 +1,13 @@
 import json
 import os
-from typing import Dict, Type
-from entity.visitor import STCPVisitorConfig, SUDPVisitorConfig, XTCPVisitorConfig
+from entity.visitor import VISITOR_TYPE_MAP
 from utils.ConfigManager import ConfigManager
+from utils.config_index import ConfigIndex
 from utils.database import DataBase
 
 # 临时配置文件地址
 database_path = "data/data.db"
 
-VISITOR_TYPE_MAP: Dict[str, Type] = {
-    'stcp': STCPVisitorConfig,
-    'sudp': SUDPVisitorConfig,
-    'xtcp': XTCPVisitorConfig,
-}
-
 def get_all_visitors() -> dict:
     """获取所有观察者  
     
@@ -131,7 +125,7 @@ def get_visitors_by_program_id(program_id: str) -> dict:
     # 验证数据库中的 id
     try:
         with DataBase(database_path) as db:
-            db_id = [str(r[0]) for r in db.query_program()]
+            db_id = db.program_ids()
     except Exception as e:
         return {"status": "失败", "message": f"数据库查询失败: {e}", "data": None}
 
@@ -225,7 +219,7 @@ def new_visitor(program_id: str, data: str) -> dict:
     # 验证 program_id
     try:
         with DataBase(database_path) as db:
-            db_id = [str(r[0]) for r in db.query_program()]
+            db_id = db.program_ids()
     except Exception as e:
         return {"status": "失败", "message": f"数据库查询失败: {e}"}
     if program_id not in db_id:
@@ -253,12 +247,10 @@ def new_visitor(program_id: str, data: str) -> dict:
     cfg = manager.load_config()
     cfg.visitors = cfg.visitors or []
 
-    # 唯一性检查
-    for v in cfg.visitors:
-        if v.name == new_cfg.name:
-            return {"status": "失败", "message": f"名字 {v.name} 已被占用"}
-        if v.bindAddr == new_cfg.bindAddr and v.bindPort == new_cfg.bindPort:
-            return {"status": "失败", "message": f"网络地址 {v.bindAddr}:{v.bindPort} 已被占用"}
+    # 唯一性检查，名称在客户端内唯一，绑定地址在全部客户端中唯一
+    conflict = ConfigIndex().check_visitor_conflict(program_id, cfg, new_cfg)
+    if conflict:
+        return {"status": "失败", "message": conflict}
 
     cfg.visitors.append(new_cfg)
     manager.save_config(cfg)
@@ -297,7 +289,7 @@ def update_visitor_by_name(program_id: str, data: str) -> dict:
         program_id = str(program_id)
     try:
         with DataBase(database_path) as db:
-            db_id = [str(r[0]) for r in db.query_program()]
+            db_id = db.program_ids()
     except Exception as e:
         return {"status": "失败", "message": f"数据库查询失败: {e}"}
     if program_id not in db_id:
@@ -338,14 +330,10 @@ def update_visitor_by_name(program_id: str, data: str) -> dict:
     except Exception as e:
         return {"status": "失败", "message": f"配置校验失败: {e}"}
 
-    # 唯一性检查（跳过自身）
-    for i, other in enumerate(cfg.visitors):
-        if i == target:
-            continue
-        if upd.name == other.name:
-            return {"status": "失败", "message": f"名字 {upd.name} 冲突"}
-        if upd.bindAddr == other.bindAddr and upd.bindPort == other.bindPort:
-            return {"status": "失败", "message": f"地址 {upd.bindAddr}:{upd.bindPort} 冲突"}
+    # 唯一性检查（跳过自身），绑定地址的范围为全部客户端
+    conflict = ConfigIndex().check_visitor_conflict(program_id, cfg, upd, replace_name=old.name)
+    if conflict:
+        return {"status": "失败", "message": conflict}
 
     cfg.visitors[target] = upd
     manager.save_config(cfg)
@@ -374,7 +362,7 @@ def delete_visitor_by_name(program_id: str, visitor_name: str) -> dict:
         program_id = str(program_id)
     try:
         with DataBase(database_path) as db:
-            db_id = [str(r[0]) for r in db.query_program()]
+            db_id = db.program_ids()
     except Exception as e:
         return {"status": "失败", "message": f"数据库查询失败: {e}"}
     if program_id not in db_id:
@@ -0,0 +1,55 @@
+# get_all_proxies 读取配置文件与查询数据库的次数应只与客户端数量有关，与隧道数量无关
+import os
+import pytest
+from utils.ConfigManager import ConfigManager
+from utils.database import DataBase
+
+def _make_clients(clients: int, proxies: int):
+    with DataBase("data/data.db") as db:
+        db.init_db()
+        for i in range(clients):
+            program_id = db.insert_program(f"client-{i}")
+            cmd_dir = os.path.join("data", "cmd", str(program_id))
+            os.makedirs(cmd_dir)
+            lines = ['serverAddr = "127.0.0.1"', "serverPort = 7000", ""]
+            for j in range(proxies):
+                lines += [
+                    "[[proxies]]",
+                    f'name = "p{i}-{j}"',
+                    'type = "tcp"',
+                    f"localPort = {10000 + j}",
+                    f"remotePort = {20000 + i * proxies + j}",
+                    "",
+                ]
+            with open(os.path.join(cmd_dir, "frpc.toml"), "w") as f:
+                f.write("\n".join(lines))
+
+@pytest.mark.parametrize("clients", [3, 6])
+@pytest.mark.parametrize("proxies", [1, 50])
+def test_io_grows_with_clients_not_proxies(tmp_path, monkeypatch, clients, proxies):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data/cmd")
+    _make_clients(clients, proxies)
+    from gradio_mcp.proxies import get_all_proxies
+
+    calls = {"load_config": 0, "query_program": 0}
+    load_config = ConfigManager.load_config
+    query_program = DataBase.query_program
+
+    def counting_load_config(self, *args, **kwargs):
+        calls["load_config"] += 1
+        return load_config(self, *args, **kwargs)
+
+    def counting_query_program(self, *args, **kwargs):
+        calls["query_program"] += 1
+        return query_program(self, *args, **kwargs)
+
+    monkeypatch.setattr(ConfigManager, "load_config", counting_load_config)
+    monkeypatch.setattr(DataBase, "query_program", counting_query_program)
+
+    result = get_all_proxies()
+
+    assert result["status"] == "成功"
+    assert len(result["data"]) == clients * proxies
+    assert calls["load_config"] == clients
+    assert calls["query_program"] == 1
@@ -1,11 +1,38 @@
-import json
-import time
+import logging
+import os
+import stat
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import Literal
 from filelock import FileLock
 from pathlib import Path
-import toml
 from entity.client import ClientConfig
-from utils.load2class import load_config
+from utils import toml_backend
+from utils.load2class import load_config_dict
+
+# 解析结果缓存的最大条目数（按客户端配置文件计）
+CONFIG_CACHE_MAX_ENTRIES = 512
+
+# 进程级的已解析配置缓存: 绝对路径 -> (文件指纹, ClientConfig)
+_config_cache: "OrderedDict[str, tuple[tuple[int, int, int], ClientConfig]]" = OrderedDict()
+_config_cache_lock = threading.Lock()
+logger = logging.getLogger("utils.ConfigManager")
+
+# 配置保存成功后的回调: callback(配置文件绝对路径, ClientConfig)
+_save_listeners = []
+
+# 进程内每个配置文件的写锁和解析锁: 绝对路径 -> threading.Lock
+_write_locks = {}
+_parse_locks = {}
+_key_locks_lock = threading.Lock()
+
+# 新建配置文件的权限（mkstemp创建的临时文件默认为0600）
+NEW_CONFIG_FILE_MODE = 0o644
+
+# 线程本地的fsync批处理状态，见 fsync_batch
+_fsync_batch = threading.local()
 
 class ConfigLoadError(Exception):
     pass
@@ -13,6 +40,141 @@ class ConfigLoadError(Exception):
 class ConfigSaveError(Exception):
     pass
 
+def _cache_get(key: str, stamp: tuple[int, int, int]) -> ClientConfig | None:
+    with _config_cache_lock:
+        item = _config_cache.get(key)
+        if item is None:
+            return None
+        if item[0] != stamp:
+            # 文件已变化，缓存作废
+            del _config_cache[key]
+            return None
+        _config_cache.move_to_end(key)
+        return item[1]
+
+def _cache_put(key: str, stamp: tuple[int, int, int], config: ClientConfig):
+    with _config_cache_lock:
+        _config_cache[key] = (stamp, config)
+        _config_cache.move_to_end(key)
+        while len(_config_cache) > CONFIG_CACHE_MAX_ENTRIES:
+            _config_cache.popitem(last=False)
+
+def invalidate_config_cache(config_file: str | Path | None = None):
+    """
+    使已解析配置的缓存失效
+    
+    Args:
+        config_file: 配置文件路径，为None时清空全部缓存
+    """
+    with _config_cache_lock:
+        if config_file is None:
+            _config_cache.clear()
+        else:
+            _config_cache.pop(os.path.abspath(config_file), None)
+
+def add_save_listener(callback):
+    """
+    注册配置保存成功后的回调，用于维护依赖配置内容的索引
+    
+    Args:
+        callback: 回调函数，参数为(配置文件绝对路径, 保存的ClientConfig)
+    """
+    if callback not in _save_listeners:
+        _save_listeners.append(callback)
+
+def _notify_saved(config_file: str, config: ClientConfig):
+    for callback in list(_save_listeners):
+        try:
+            callback(config_file, config)
+        except Exception:
+            logger.exception(f"配置{config_file}保存回调执行失败")
+
+def _key_lock(locks: dict, key: str) -> threading.Lock:
+    with _key_locks_lock:
+        lock = locks.get(key)
+        if lock is None:
+            lock = locks[key] = threading.Lock()
+        return lock
+
+def _fsync_path(path: str, directory: bool = False):
+    """把文件或目录的内容刷入磁盘，目录fsync用于持久化rename"""
+    flags = os.O_RDONLY | (getattr(os, "O_DIRECTORY", 0) if directory else 0)
+    try:
+        fd = os.open(path, flags)
+    except OSError:
+        # 部分平台不支持打开目录
+        if directory:
+            return
+        raise
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+@contextmanager
+def fsync_batch():
+    """
+    批量保存配置时推迟fsync，退出时对每个写过的文件和目录各fsync一次
+
+    批处理期间每次保存仍然是完整的原子替换，只是不等待数据落盘，
+    写入大量配置时可以省去重复的fsync开销。可以嵌套，最外层退出时统一fsync。
+
+    示例:
+        with fsync_batch():
+            for manager, config in items:
+                manager.save_config(config)
+    """
+    depth = getattr(_fsync_batch, "depth", 0)
+    if depth == 0:
+        _fsync_batch.pending = {}
+    _fsync_batch.depth = depth + 1
+    try:
+        yield
+    finally:
+        _fsync_batch.depth = depth
+        if depth == 0:
+            pending, _fsync_batch.pending = _fsync_batch.pending, {}
+            for path in pending:
+                try:
+                    _fsync_path(path)
+                except OSError as e:
+                    logger.warning(f"fsync配置文件{path}失败: {str(e)}")
+            for directory in set(pending.values()):
+                _fsync_path(directory, directory=True)
+
+def _atomic_write_text(path: Path, text: str):
+    """
+    原子地写入文本文件: 先写同目录下的临时文件，fsync后用os.replace替换目标文件
+
+    读取方要么看到旧文件，要么看到完整的新文件，不会读到写了一半的内容。
+    新文件沿用旧文件的权限，在fsync_batch中时推迟fsync。
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    deferred = getattr(_fsync_batch, "depth", 0) > 0
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = NEW_CONFIG_FILE_MODE
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            if not deferred:
+                os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if deferred:
+        _fsync_batch.pending[os.path.abspath(path)] = directory
+    else:
+        _fsync_path(directory, directory=True)
+
 class ConfigManager:
     
     def __init__(self, 
@@ -32,25 +194,43 @@ class ConfigManager:
         self.timeout = timeout
         self.lock = FileLock(self.lock_file, timeout=self.timeout)
         self.config_type = config_type
+        self.cache_key = os.path.abspath(self.config_file)
     
     def load_config(self) -> ClientConfig:
         """
         加载配置文件
         
+        文件未变化时（mtime_ns、size、inode均一致）直接使用缓存的解析结果，
+        返回的是缓存对象的深拷贝，调用方可以随意修改而不会影响缓存。
+        读取不加任何锁。
+        
         Returns:
-            dict: 配置文件内容
+            ClientConfig: 配置文件内容
         """
         try:
-            with self.lock:
-                if not self.config_file.exists():
-                    raise FileNotFoundError(f"配置文件{self.config_file}不存在")
-                with open(self.config_file, 'r') as f:
-                    if self.config_type == 'toml':
-                        toml_data = toml.load(f)
-                        config = load_config(json.dumps(toml_data, indent=4))
-                        return config
-                    else:
-                        raise NotImplementedError(f"配置文件格式{self.config_type}不支持")
+            # 写入方总是用 os.replace 发布完整的新文件，读取不需要加锁：
+            # 打开的文件描述符始终对应某一个完整版本，指纹也取自同一个描述符
+            try:
+                f = open(self.config_file, 'rb')
+            except FileNotFoundError:
+                invalidate_config_cache(self.config_file)
+                raise FileNotFoundError(f"配置文件{self.config_file}不存在")
+            with f:
+                st = os.fstat(f.fileno())
+                stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+                cached = _cache_get(self.cache_key, stamp)
+                if cached is not None:
+                    return cached.model_copy(deep=True)
+                # 缓存未命中时同一文件只解析一次，其余读取方等待后直接使用缓存
+                with _key_lock(_parse_locks, self.cache_key):
+                    cached = _cache_get(self.cache_key, stamp)
+                    if cached is None:
+                        if self.config_type == 'toml':
+                            cached = load_config_dict(toml_backend.load(f))
+                        else:
+                            raise NotImplementedError(f"配置文件格式{self.config_type}不支持")
+                        _cache_put(self.cache_key, stamp, cached)
+            return cached.model_copy(deep=True)
         except Exception as e:
             raise ConfigLoadError(f"读取配置文件失败: {str(e)}")
 
@@ -58,17 +238,25 @@ class ConfigManager:
         """
         保存配置文件
         
+        写入是原子的，在 fsync_batch 中调用时推迟fsync。
+        
         Args:
             config (ClientConfig): 需要保存的config对象
         """
         
         try:
-            with self.lock:
-                with open(self.config_file, 'w') as f:
-                    data = config.model_dump(exclude_none= True, by_alias=True)
-                    if self.config_type == 'toml':
-                        toml.dump(data, f)
-                    else:
-                        raise NotImplementedError(f"配置文件格式{self.config_type}不支持")
+            data = config.model_dump(exclude_none= True, by_alias=True)
+            if self.config_type == 'toml':
+                text = toml_backend.dumps(data)
+            else:
+                raise NotImplementedError(f"配置文件格式{self.config_type}不支持")
+            # 进程内的写入方用线程锁排队，文件锁只用于和其它进程互斥
+            with _key_lock(_write_locks, self.cache_key), self.lock:
+                # 先写临时文件再替换，崩溃或frpc同时重载时不会读到截断的配置
+                _atomic_write_text(self.config_file, text)
         except Exception as e:
             raise ConfigSaveError(f"保存配置文件失败: {str(e)}")
+        finally:
+            # 无论写入成功与否，文件内容都可能已变化
+            invalidate_config_cache(self.config_file)
+        _notify_saved(self.cache_key, config)
@@ -0,0 +1,56 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    获取进程级的后台事件循环，首次调用时在守护线程中启动。
+    
+    面板中需要长期运行的异步任务（状态轮询等）都运行在这个事件循环上，
+    与 Gradio 自身的事件循环互不干扰。
+
+    Returns:
+        asyncio.AbstractEventLoop: 后台事件循环
+    """
+    global _loop
+    if _loop is not None:
+        return _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever,
+                name="frpc-panel-loop",
+                daemon=True
+            )
+            thread.start()
+            _loop = loop
+    return _loop
+
+def submit(coro: Coroutine[Any, Any, Any]) -> concurrent.futures.Future:
+    """
+    将协程提交到后台事件循环中执行。
+
+    Args:
+        coro (Coroutine): 需要执行的协程
+
+    Returns:
+        concurrent.futures.Future: 可在任意线程中等待的结果
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+def in_background_loop() -> bool:
+    """
+    判断当前是否运行在后台事件循环线程中。
+
+    Returns:
+        bool: 是则为 True
+    """
+    try:
+        return asyncio.get_running_loop() is _loop
+    except RuntimeError:
+        return False
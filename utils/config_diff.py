@@ -0,0 +1,38 @@
+from typing import Any, Dict
+from entity.client import ClientConfig
+
+# 配置变化后需要的操作: 无需操作、热重载、重启进程
+CHANGE_NONE = "none"
+CHANGE_RELOAD = "reload"
+CHANGE_RESTART = "restart"
+
+# frpc 的 /api/reload 只会重新加载这些字段，其余字段（serverAddr、auth、transport、
+# webServer、log 等）只在进程启动时读取，修改后必须重启才能生效
+RELOADABLE_FIELDS = {"proxies", "visitors", "start"}
+
+def _dump(config: ClientConfig) -> Dict[str, Any]:
+    return config.model_dump(mode="json", by_alias=True)
+
+def classify_config_change(old: ClientConfig | None, new: ClientConfig) -> str:
+    """
+    比较进程正在使用的配置与新配置，判断让新配置生效的最小代价
+
+    Args:
+        old (ClientConfig | None): 进程启动或上次热重载时的配置，未知时为 None
+        new (ClientConfig): 新配置
+
+    Returns:
+        str: CHANGE_NONE、CHANGE_RELOAD 或 CHANGE_RESTART；old 为 None 时无法比较，返回 CHANGE_RELOAD
+    """
+    if old is None:
+        return CHANGE_RELOAD
+    old_data, new_data = _dump(old), _dump(new)
+    for key in old_data.keys() | new_data.keys():
+        if key not in RELOADABLE_FIELDS and old_data.get(key) != new_data.get(key):
+            return CHANGE_RESTART
+    if any(old_data.get(key) != new_data.get(key) for key in RELOADABLE_FIELDS):
+        return CHANGE_RELOAD
+    # includes 引用的文件内容无法在这里比较，交给 frpc 重新读取
+    if new.includes:
+        return CHANGE_RELOAD
+    return CHANGE_NONE
@@ -0,0 +1,376 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Set, Tuple
+from entity.client import ClientConfig
+from utils.ConfigManager import ConfigManager, add_save_listener
+
+# 客户端目录，每个客户端的配置位于 CMD_DIR/<id>/frpc.toml
+CMD_DIR = "data/cmd"
+# frpc 未配置 serverAddr/serverPort 时使用的默认值
+DEFAULT_SERVER_ADDR = "0.0.0.0"
+DEFAULT_SERVER_PORT = 7000
+# 在 frps 上占用 remotePort 的隧道类型
+REMOTE_PORT_PROXY_TYPES = ("tcp", "udp")
+# 在 frps 上占用 customDomains 的隧道类型
+CUSTOM_DOMAIN_PROXY_TYPES = ("http", "https")
+# 监听本机全部地址的 bindAddr，与同端口的任何地址都冲突
+WILDCARD_BIND_ADDRS = ("0.0.0.0", "::", "")
+
+# frps 服务端地址: (serverAddr, serverPort)
+Endpoint = Tuple[str, int]
+# 索引条目的唯一标识: (客户端ID, 隧道/观察者名称)
+EntryKey = Tuple[str, str]
+
+logger = logging.getLogger("utils.config_index")
+
+def server_endpoint(config: ClientConfig) -> Endpoint:
+    """
+    获取客户端连接的 frps 服务端地址，未配置的部分使用 frpc 的默认值
+
+    Args:
+        config (ClientConfig): 客户端配置
+
+    Returns:
+        Endpoint: (serverAddr, serverPort)
+    """
+    return (config.serverAddr or DEFAULT_SERVER_ADDR, config.serverPort or DEFAULT_SERVER_PORT)
+
+def format_endpoint(endpoint: Endpoint) -> str:
+    return f"{endpoint[0]}:{endpoint[1]}"
+
+class ConfigIndex:
+    """
+    全部客户端的隧道与观察者索引。
+
+    首次使用时扫描 CMD_DIR 建立，之后通过 ConfigManager 的保存回调增量更新，
+    按名称、远程端口、自定义域名和观察者绑定端口查找都只需要字典查询。
+    """
+    # 单例代码
+    _instance_lock = threading.Lock()
+    def __new__(cls, *args, **kwargs):
+        if not hasattr(ConfigIndex, "_instance"):
+            with ConfigIndex._instance_lock:
+                if not hasattr(ConfigIndex, "_instance"):
+                    ConfigIndex._instance = object.__new__(cls)
+        return ConfigIndex._instance
+
+    def __init__(self):
+        # 单例会被多次调用__init__, 只初始化一次
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        self._lock = threading.RLock()
+        self._built = False
+        # 客户端ID -> {"endpoint", "user", "proxies": [条目], "visitors": [条目]}
+        self.clients: Dict[str, Dict[str, Any]] = {}
+        # 隧道名称 -> {客户端ID: 条目}
+        self.proxy_names: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # 观察者名称 -> {客户端ID: 条目}
+        self.visitor_names: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # 远程端口 -> {frps地址: {条目标识: 条目}}
+        self.remote_ports: Dict[int, Dict[Endpoint, Dict[EntryKey, Dict[str, Any]]]] = {}
+        # 自定义域名 -> {frps地址: {条目标识: 条目}}
+        self.custom_domains: Dict[str, Dict[Endpoint, Dict[EntryKey, Dict[str, Any]]]] = {}
+        # 观察者绑定端口 -> {条目标识: 条目}
+        self.bind_ports: Dict[int, Dict[EntryKey, Dict[str, Any]]] = {}
+
+    def _ensure_built(self):
+        """未建立索引时扫描全部客户端配置，调用方需持有 self._lock"""
+        if self._built:
+            return
+        self._built = True
+        if not os.path.isdir(CMD_DIR):
+            return
+        for entry in os.listdir(CMD_DIR):
+            cfg_file = os.path.join(CMD_DIR, entry, "frpc.toml")
+            if not os.path.isfile(cfg_file):
+                continue
+            try:
+                config = ConfigManager(cfg_file).load_config()
+            except Exception:
+                logger.warning(f"建立隧道索引时读取配置文件 {cfg_file} 出错，已跳过")
+                continue
+            self._add_client(entry, config)
+
+    def update_client(self, client_id: str, config: ClientConfig):
+        """
+        用客户端最新的配置替换其在索引中的全部条目
+
+        Args:
+            client_id (str): 客户端ID
+            config (ClientConfig): 客户端配置
+        """
+        with self._lock:
+            if not self._built:
+                # 索引尚未建立，首次查询时会扫描到最新的配置
+                return
+            self._remove_client(client_id)
+            self._add_client(client_id, config)
+
+    def remove_client(self, client_id: str):
+        """
+        从索引中移除客户端的全部条目
+
+        Args:
+            client_id (str): 客户端ID
+        """
+        with self._lock:
+            self._remove_client(client_id)
+
+    def _add_client(self, client_id: str, config: ClientConfig):
+        endpoint = server_endpoint(config)
+        proxies = []
+        for proxy in config.proxies or []:
+            entry = {
+                "client_id": client_id,
+                "kind": "proxy",
+                "name": proxy.name,
+                "type": proxy.type_,
+                "server": format_endpoint(endpoint),
+                "remotePort": getattr(proxy, "remotePort", None),
+                "customDomains": list(getattr(proxy, "customDomains", None) or []),
+            }
+            proxies.append(entry)
+            key = (client_id, proxy.name)
+            self.proxy_names.setdefault(proxy.name, {})[client_id] = entry
+            if entry["remotePort"]:
+                self.remote_ports.setdefault(entry["remotePort"], {}) \
+                    .setdefault(endpoint, {})[key] = entry
+            for domain in entry["customDomains"]:
+                self.custom_domains.setdefault(domain, {}) \
+                    .setdefault(endpoint, {})[key] = entry
+        visitors = []
+        for visitor in config.visitors or []:
+            entry = {
+                "client_id": client_id,
+                "kind": "visitor",
+                "name": visitor.name,
+                "type": visitor.type_,
+                "server": format_endpoint(endpoint),
+                "serverName": visitor.serverName,
+                "bindAddr": visitor.bindAddr,
+                "bindPort": visitor.bindPort,
+            }
+            visitors.append(entry)
+            self.visitor_names.setdefault(visitor.name, {})[client_id] = entry
+            # bindPort 小于等于0时 frpc 不会监听端口
+            if visitor.bindPort and visitor.bindPort > 0:
+                self.bind_ports.setdefault(visitor.bindPort, {})[(client_id, visitor.name)] = entry
+        self.clients[client_id] = {
+            "endpoint": endpoint,
+            "user": config.user,
+            "proxies": proxies,
+            "visitors": visitors,
+        }
+
+    def _remove_client(self, client_id: str):
+        client = self.clients.pop(client_id, None)
+        if client is None:
+            return
+        endpoint = client["endpoint"]
+        for entry in client["proxies"]:
+            key = (client_id, entry["name"])
+            _discard(self.proxy_names, entry["name"], client_id)
+            if entry["remotePort"]:
+                _discard_nested(self.remote_ports, entry["remotePort"], endpoint, key)
+            for domain in entry["customDomains"]:
+                _discard_nested(self.custom_domains, domain, endpoint, key)
+        for entry in client["visitors"]:
+            _discard(self.visitor_names, entry["name"], client_id)
+            if entry["bindPort"] and entry["bindPort"] > 0:
+                _discard(self.bind_ports, entry["bindPort"], (client_id, entry["name"]))
+
+    def sync_client(self, client_id: str, config: ClientConfig):
+        """
+        用刚从磁盘读取的配置同步客户端的条目，配置被外部修改过时也能保证检查结果正确
+
+        Args:
+            client_id (str): 客户端ID
+            config (ClientConfig): 客户端配置
+        """
+        with self._lock:
+            self._ensure_built()
+            self._remove_client(client_id)
+            self._add_client(client_id, config)
+
+    def check_proxy_conflict(self,
+                             client_id: str,
+                             config: ClientConfig,
+                             proxy,
+                             replace_name: str | None = None,
+                             released: Set[EntryKey] | None = None,
+                             sync: bool = True) -> str | None:
+        """
+        检查隧道在其连接的 frps 服务端上是否与已有隧道冲突
+
+        冲突的范围是连接同一个 frps 服务端(serverAddr:serverPort)的全部客户端:
+        - 名称: 同一客户端内不能重名；frps 以 user.name 区分隧道，
+          user 相同的其它客户端也不能重名
+        - tcp/udp 的 remotePort 不能重复
+        - http/https 的 customDomains 不能重复
+
+        Args:
+            client_id (str): 隧道所在的客户端ID
+            config (ClientConfig): 客户端当前配置，用于确定 frps 服务端和 user
+            proxy: 待检查的隧道配置
+            replace_name (str | None): 修改隧道时被替换的旧隧道名称，检查时跳过它
+            released (Set[EntryKey] | None): 即将被删除或替换的隧道，检查时跳过它们
+            sync (bool): 检查前是否先用 config 同步该客户端的条目，
+                已调用过 sync_client 时可以传 False
+
+        Returns:
+            str | None: 冲突描述，无冲突时为 None
+        """
+        endpoint = server_endpoint(config)
+        skip = set(released or ())
+        if replace_name is not None:
+            skip.add((client_id, replace_name))
+        with self._lock:
+            if sync:
+                self.sync_client(client_id, config)
+            else:
+                self._ensure_built()
+            for other_id, entry in self.proxy_names.get(proxy.name, {}).items():
+                if (other_id, proxy.name) in skip:
+                    continue
+                if other_id == client_id:
+                    return f"名字{proxy.name}已经被占用"
+                other = self.clients[other_id]
+                if other["endpoint"] == endpoint and other["user"] == config.user:
+                    return f"名字{proxy.name}已经被同一服务端{format_endpoint(endpoint)}下的客户端{other_id}占用"
+            if proxy.type_ in REMOTE_PORT_PROXY_TYPES and getattr(proxy, "remotePort", None):
+                entries = self.remote_ports.get(proxy.remotePort, {}).get(endpoint, {})
+                for key, entry in entries.items():
+                    if key in skip or entry["type"] not in REMOTE_PORT_PROXY_TYPES:
+                        continue
+                    return f"端口{proxy.remotePort}已经被客户端{key[0]}的{key[1]}占用"
+            if proxy.type_ in CUSTOM_DOMAIN_PROXY_TYPES:
+                for domain in getattr(proxy, "customDomains", None) or []:
+                    entries = self.custom_domains.get(domain, {}).get(endpoint, {})
+                    for key, entry in entries.items():
+                        if key in skip or entry["type"] not in CUSTOM_DOMAIN_PROXY_TYPES:
+                            continue
+                        return f"域名{domain}已经被客户端{key[0]}的{key[1]}占用"
+        return None
+
+    def check_visitor_conflict(self,
+                               client_id: str,
+                               config: ClientConfig,
+                               visitor,
+                               replace_name: str | None = None,
+                               sync: bool = True) -> str | None:
+        """
+        检查观察者是否与已有观察者冲突
+
+        观察者在 frpc 所在的本机监听，冲突的范围是全部客户端:
+        - 名称: 同一客户端内不能重名
+        - bindAddr:bindPort 不能重复；bindAddr 为 0.0.0.0 或 :: 时与同端口的任何地址都冲突
+
+        Args:
+            client_id (str): 观察者所在的客户端ID
+            config (ClientConfig): 客户端当前配置
+            visitor: 待检查的观察者配置
+            replace_name (str | None): 修改观察者时被替换的旧观察者名称，检查时跳过它
+            sync (bool): 检查前是否先用 config 同步该客户端的条目，
+                已调用过 sync_client 时可以传 False
+
+        Returns:
+            str | None: 冲突描述，无冲突时为 None
+        """
+        skip = (client_id, replace_name) if replace_name is not None else None
+        with self._lock:
+            if sync:
+                self.sync_client(client_id, config)
+            else:
+                self._ensure_built()
+            own = self.visitor_names.get(visitor.name, {}).get(client_id)
+            if own is not None and (client_id, visitor.name) != skip:
+                return f"名字{visitor.name}已经被占用"
+            # bindPort 小于等于0时 frpc 不会监听端口
+            if visitor.bindPort and visitor.bindPort > 0:
+                for key, entry in self.bind_ports.get(visitor.bindPort, {}).items():
+                    if key == skip:
+                        continue
+                    if entry["bindAddr"] == visitor.bindAddr \
+                            or entry["bindAddr"] in WILDCARD_BIND_ADDRS \
+                            or visitor.bindAddr in WILDCARD_BIND_ADDRS:
+                        return f"地址{entry['bindAddr']}:{visitor.bindPort}已经被客户端{key[0]}的{key[1]}占用"
+        return None
+
+    def find_by_name(self, name: str) -> List[Dict[str, Any]]:
+        """按名称查找全部客户端中的隧道和观察者"""
+        with self._lock:
+            self._ensure_built()
+            result = list(self.proxy_names.get(name, {}).values())
+            result += list(self.visitor_names.get(name, {}).values())
+            return [dict(entry) for entry in result]
+
+    def find_by_remote_port(self, port: int, endpoint: Endpoint | None = None) -> List[Dict[str, Any]]:
+        """按远程端口查找隧道，endpoint 为 None 时查找全部 frps 服务端"""
+        with self._lock:
+            self._ensure_built()
+            return _collect(self.remote_ports.get(port, {}), endpoint)
+
+    def find_by_domain(self, domain: str, endpoint: Endpoint | None = None) -> List[Dict[str, Any]]:
+        """按自定义域名查找隧道，endpoint 为 None 时查找全部 frps 服务端"""
+        with self._lock:
+            self._ensure_built()
+            return _collect(self.custom_domains.get(domain, {}), endpoint)
+
+    def find_by_bind_port(self, port: int) -> List[Dict[str, Any]]:
+        """按本机绑定端口查找观察者"""
+        with self._lock:
+            self._ensure_built()
+            return [dict(entry) for entry in self.bind_ports.get(port, {}).values()]
+
+def proxy_claims(config: ClientConfig, proxy) -> List[Tuple[tuple, str]]:
+    """
+    列出隧道在 frps 服务端上占用的资源，规则与 ConfigIndex.check_proxy_conflict 一致，
+    用于批量操作时检查同一批次内新增的隧道之间是否冲突
+
+    Args:
+        config (ClientConfig): 隧道所在客户端的配置
+        proxy: 隧道配置
+
+    Returns:
+        List[Tuple[tuple, str]]: [(资源标识, 资源描述)]
+    """
+    endpoint = server_endpoint(config)
+    claims = [(("name", endpoint, config.user, proxy.name), f"名字{proxy.name}")]
+    if proxy.type_ in REMOTE_PORT_PROXY_TYPES and getattr(proxy, "remotePort", None):
+        claims.append((("port", endpoint, proxy.remotePort), f"端口{proxy.remotePort}"))
+    if proxy.type_ in CUSTOM_DOMAIN_PROXY_TYPES:
+        for domain in getattr(proxy, "customDomains", None) or []:
+            claims.append((("domain", endpoint, domain), f"域名{domain}"))
+    return claims
+
+def _discard(index: dict, value, key):
+    entries = index.get(value)
+    if entries is None:
+        return
+    entries.pop(key, None)
+    if not entries:
+        del index[value]
+
+def _discard_nested(index: dict, value, endpoint: Endpoint, key: EntryKey):
+    by_endpoint = index.get(value)
+    if by_endpoint is None:
+        return
+    _discard(by_endpoint, endpoint, key)
+    if not by_endpoint:
+        del index[value]
+
+def _collect(by_endpoint: dict, endpoint: Endpoint | None) -> List[Dict[str, Any]]:
+    if endpoint is not None:
+        return [dict(entry) for entry in by_endpoint.get(endpoint, {}).values()]
+    return [dict(entry) for entries in by_endpoint.values() for entry in entries.values()]
+
+def _on_config_saved(config_file: str, config: ClientConfig):
+    """ConfigManager 保存回调，只处理 CMD_DIR 下的客户端配置"""
+    client_dir = os.path.dirname(config_file)
+    if os.path.dirname(client_dir) != os.path.abspath(CMD_DIR):
+        return
+    ConfigIndex().update_client(os.path.basename(client_dir), config)
+
+add_save_listener(_on_config_saved)
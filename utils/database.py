@@ -1,6 +1,68 @@
+import os
 import sqlite3
 import threading
 
+# 每个连接缓存的预编译语句数量
+CACHED_STATEMENTS = 256
+# 数据库被其它连接锁定时的等待时间（秒）
+BUSY_TIMEOUT = 5.0
+
+# 线程本地的长连接池: 数据库绝对路径 -> sqlite3.Connection
+_pool = threading.local()
+
+# 进程内的程序注册表: 数据库绝对路径 -> {程序ID: 数据库行}
+# 首次查询时从数据库加载，之后由 insert/update/delete_program 同步维护
+_registry = {}
+_registry_lock = threading.RLock()
+
+# admin UI 端口分配表，每个客户端最多占用一个端口，删除客户端时一并释放
+ADMIN_PORT_TABLE_SQL = '''
+CREATE TABLE IF NOT EXISTS admin_port (
+    port INTEGER PRIMARY KEY,
+    program_id INTEGER NOT NULL UNIQUE REFERENCES program(id) ON DELETE CASCADE
+)
+'''
+
+def _get_connection(db_path: str) -> sqlite3.Connection:
+    """
+    获取当前线程下指定数据库的长连接，首次获取时创建并设置pragma
+    
+    连接在线程内复用，sqlite3 会在连接上缓存预编译语句，重复执行同样的 SQL 时
+    不需要重新解析。
+    
+    Args:
+        db_path (str): 数据库文件路径
+    
+    Returns:
+        sqlite3.Connection: 数据库连接
+    """
+    key = os.path.abspath(db_path)
+    conns = getattr(_pool, "conns", None)
+    if conns is None:
+        conns = _pool.conns = {}
+    conn = conns.get(key)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, cached_statements=CACHED_STATEMENTS)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conns[key] = conn
+    return conn
+
+def invalidate_registry(db_path=None):
+    """
+    清除程序注册表，下次查询时重新从数据库加载
+    
+    Args:
+        db_path (str, optional): 数据库文件路径，为None时清除全部. Defaults to None.
+    """
+    with _registry_lock:
+        if db_path is None:
+            _registry.clear()
+        else:
+            _registry.pop(os.path.abspath(db_path), None)
+
 class DataBase:
     """
     数据库类，使用sqlite3实现基本的数据库操作
@@ -15,23 +77,24 @@ class DataBase:
             db_path (str): 数据库文件路径
         """
         self.db_path = db_path
+        self.registry_key = os.path.abspath(db_path)
         self.local = threading.local()  # 用于存储线程本地资源
 
     def __enter__(self):
         """
-        上下文管理器入口，自动建立数据库连接
+        上下文管理器入口，从线程本地连接池获取数据库连接
         
         Returns:
             DataBase: 返回自身实例便于进一步操作
         """
         if not hasattr(self.local, 'conn'):
-            self.local.conn = sqlite3.connect(self.db_path)
+            self.local.conn = _get_connection(self.db_path)
             self.local.cursor = self.local.conn.cursor()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """
-        上下文管理器出口，自动清理数据库连接
+        上下文管理器出口，关闭游标并把连接归还连接池，连接本身不会关闭
         
         Args:
             exc_type (type): 异常类型（如果发生）
@@ -42,7 +105,9 @@ class DataBase:
             self.local.cursor.close()
             del self.local.cursor
         if hasattr(self.local, 'conn'):
-            self.local.conn.close()
+            # 出错时回滚未提交的事务，避免影响连接的下一次使用
+            if self.local.conn.in_transaction:
+                self.local.conn.rollback()
             del self.local.conn
 
     def init_db(self):
@@ -56,6 +121,7 @@ class DataBase:
             raise RuntimeError("Database connection not established")
         
         # 清理旧表
+        self.local.cursor.execute('DROP TABLE IF EXISTS admin_port')
         self.local.cursor.execute('DROP TABLE IF EXISTS program')
         
         # 创建新表
@@ -63,11 +129,75 @@ class DataBase:
         CREATE TABLE IF NOT EXISTS program (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
-            description TEXT
+            description TEXT,
+            restart_policy TEXT NOT NULL DEFAULT 'on-failure',
+            desired_state TEXT NOT NULL DEFAULT 'stopped'
         )
         '''
         self.local.cursor.execute(create_sql)
+        self.local.cursor.execute(ADMIN_PORT_TABLE_SQL)
+        self.local.conn.commit()
+        invalidate_registry(self.db_path)
+
+    def upgrade_db(self):
+        """
+        升级旧版本的数据库表结构，补齐新增的列，已是最新结构时不做任何修改
+        
+        Raises:
+            RuntimeError: 当数据库连接未建立时抛出
+        """
+        if not hasattr(self.local, 'cursor') or not hasattr(self.local, 'conn'):
+            raise RuntimeError("Database connection not established")
+        
+        self.local.cursor.execute("PRAGMA table_info(program)")
+        columns = {row[1] for row in self.local.cursor.fetchall()}
+        if not columns:
+            return
+        if "restart_policy" not in columns:
+            self.local.cursor.execute(
+                "ALTER TABLE program ADD COLUMN restart_policy TEXT NOT NULL DEFAULT 'on-failure'"
+            )
+        if "desired_state" not in columns:
+            self.local.cursor.execute(
+                "ALTER TABLE program ADD COLUMN desired_state TEXT NOT NULL DEFAULT 'stopped'"
+            )
+        self.local.cursor.execute(ADMIN_PORT_TABLE_SQL)
         self.local.conn.commit()
+        invalidate_registry(self.db_path)
+
+    def _programs(self):
+        """
+        获取当前数据库的程序注册表，未加载时从数据库读取全表
+        
+        调用方需持有 _registry_lock。
+        
+        Returns:
+            dict: 程序ID -> 数据库行
+        """
+        programs = _registry.get(self.registry_key)
+        if programs is None:
+            self.local.cursor.execute('SELECT * FROM program ORDER BY id')
+            programs = {row[0]: row for row in self.local.cursor.fetchall()}
+            _registry[self.registry_key] = programs
+        return programs
+
+    def _refresh_program(self, program_id):
+        """
+        从数据库重新读取一条程序记录并同步到注册表，记录不存在时从注册表移除
+        
+        Args:
+            program_id (int): 程序ID
+        """
+        with _registry_lock:
+            programs = _registry.get(self.registry_key)
+            if programs is None:
+                return
+            self.local.cursor.execute('SELECT * FROM program WHERE id = ?', (program_id,))
+            row = self.local.cursor.fetchone()
+            if row is None:
+                programs.pop(int(program_id), None)
+            else:
+                programs[row[0]] = row
 
     def query_program(self, program_id=None, name=None):
         """
@@ -81,27 +211,40 @@ class DataBase:
             RuntimeError: 当数据库连接未建立时抛出
         
         Returns:
-            list: 查询结果列表（元组形式），每个元组包含(id, name, description)
+            list: 查询结果列表（元组形式），每个元组包含(id, name, description, restart_policy, desired_state)
         """
         if not hasattr(self.local, 'cursor'):
             raise RuntimeError("Database connection not established")
-            
-        if program_id is not None:
-            self.local.cursor.execute(
-                'SELECT * FROM program WHERE id = ?', 
-                (program_id,)
-            )
-        elif name is not None:
-            self.local.cursor.execute(
-                'SELECT * FROM program WHERE name = ?', 
-                (name,)
-            )
-        else:
-            self.local.cursor.execute('SELECT * FROM program')
-            
-        return self.local.cursor.fetchall()
+        
+        with _registry_lock:
+            programs = self._programs()
+            if program_id is not None:
+                try:
+                    row = programs.get(int(program_id))
+                except (TypeError, ValueError):
+                    row = None
+                return [row] if row is not None else []
+            if name is not None:
+                return [row for row in programs.values() if row[1] == name]
+            return list(programs.values())
 
-    def update_program(self, program_id, name=None, description=None):
+    def program_ids(self):
+        """
+        获取全部程序ID，用于校验客户端ID是否存在
+        
+        Raises:
+            RuntimeError: 当数据库连接未建立时抛出
+        
+        Returns:
+            set: 字符串形式的程序ID集合
+        """
+        if not hasattr(self.local, 'cursor'):
+            raise RuntimeError("Database connection not established")
+        
+        with _registry_lock:
+            return {str(program_id) for program_id in self._programs()}
+
+    def update_program(self, program_id, name=None, description=None, restart_policy=None, desired_state=None):
         """
         更新程序信息，支持部分字段更新
         
@@ -109,6 +252,8 @@ class DataBase:
             program_id (int): 要更新的程序ID
             name (str, optional): 新名称. Defaults to None.
             description (str, optional): 新描述. Defaults to None.
+            restart_policy (str, optional): 新的重启策略. Defaults to None.
+            desired_state (str, optional): 期望状态，running 或 stopped. Defaults to None.
         
         Raises:
             RuntimeError: 当数据库连接未建立时抛出
@@ -133,6 +278,12 @@ class DataBase:
         if description is not None:
             update_fields.append("description = ?")
             params.append(description)
+        if restart_policy is not None:
+            update_fields.append("restart_policy = ?")
+            params.append(restart_policy)
+        if desired_state is not None:
+            update_fields.append("desired_state = ?")
+            params.append(desired_state)
             
         if not update_fields:
             return False
@@ -142,7 +293,10 @@ class DataBase:
         
         self.local.cursor.execute(update_sql, tuple(params))
         self.local.conn.commit()
-        return self.local.cursor.rowcount > 0
+        updated = self.local.cursor.rowcount > 0
+        if updated:
+            self._refresh_program(program_id)
+        return updated
 
     def delete_program(self, program_id):
         """
@@ -165,7 +319,12 @@ class DataBase:
             (program_id,)
         )
         self.local.conn.commit()
-        return self.local.cursor.rowcount > 0
+        deleted = self.local.cursor.rowcount > 0
+        with _registry_lock:
+            programs = _registry.get(self.registry_key)
+            if programs is not None:
+                programs.pop(int(program_id), None)
+        return deleted
 
     def insert_program(self, name, description=None):
         """
@@ -190,4 +349,147 @@ class DataBase:
         insert_sql = "INSERT INTO program (name, description) VALUES (?, ?)"
         self.local.cursor.execute(insert_sql, (name, description))
         self.local.conn.commit()
-        return self.local.cursor.lastrowid
+        program_id = self.local.cursor.lastrowid
+        self._refresh_program(program_id)
+        return program_id
+
+    def query_admin_port(self, port=None, program_id=None):
+        """
+        查询 admin UI 端口的分配情况
+        
+        Args:
+            port (int, optional): 按端口查询. Defaults to None.
+            program_id (int, optional): 按程序ID查询. Defaults to None.
+        
+        Raises:
+            RuntimeError: 当数据库连接未建立时抛出
+        
+        Returns:
+            list: 查询结果列表，每个元组包含(port, program_id)
+        """
+        if not hasattr(self.local, 'cursor'):
+            raise RuntimeError("Database connection not established")
+        
+        if port is not None:
+            self.local.cursor.execute('SELECT * FROM admin_port WHERE port = ?', (port,))
+        elif program_id is not None:
+            self.local.cursor.execute('SELECT * FROM admin_port WHERE program_id = ?', (program_id,))
+        else:
+            self.local.cursor.execute('SELECT * FROM admin_port ORDER BY port')
+        return self.local.cursor.fetchall()
+
+    def set_admin_port(self, program_id, port):
+        """
+        为程序登记 admin UI 端口，程序原有的端口会被释放
+        
+        Args:
+            program_id (int): 程序ID
+            port (int): 端口号
+        
+        Raises:
+            RuntimeError: 当数据库连接未建立时抛出
+            ValueError: 端口已被其它程序占用
+        """
+        if not hasattr(self.local, 'cursor') or not hasattr(self.local, 'conn'):
+            raise RuntimeError("数据库连接尚未建立")
+        try:
+            self.local.cursor.execute('DELETE FROM admin_port WHERE program_id = ?', (program_id,))
+            self.local.cursor.execute(
+                'INSERT INTO admin_port (port, program_id) VALUES (?, ?)', (port, program_id)
+            )
+            self.local.conn.commit()
+        except sqlite3.IntegrityError:
+            self.local.conn.rollback()
+            owner = self.query_admin_port(port=port)
+            if owner:
+                raise ValueError(f"端口{port}已被客户端{owner[0][1]}占用")
+            raise ValueError(f"程序{program_id}不存在")
+
+    def allocate_admin_port(self, program_id, port_start, port_end):
+        """
+        在端口范围内为程序分配一个空闲的 admin UI 端口，程序已在范围内登记过端口时直接返回该端口
+        
+        Args:
+            program_id (int): 程序ID
+            port_start (int): 范围起始端口（包含）
+            port_end (int): 范围结束端口（包含）
+        
+        Raises:
+            RuntimeError: 当数据库连接未建立时抛出
+        
+        Returns:
+            int | None: 分配到的端口，范围内没有空闲端口时为None
+        """
+        if not hasattr(self.local, 'cursor') or not hasattr(self.local, 'conn'):
+            raise RuntimeError("数据库连接尚未建立")
+        # 写锁保证并发分配时不会拿到同一个端口
+        self.local.cursor.execute('BEGIN IMMEDIATE')
+        try:
+            self.local.cursor.execute('SELECT port FROM admin_port WHERE program_id = ?', (program_id,))
+            row = self.local.cursor.fetchone()
+            if row and port_start <= row[0] <= port_end:
+                self.local.conn.rollback()
+                return row[0]
+            self.local.cursor.execute(
+                'SELECT port FROM admin_port WHERE port BETWEEN ? AND ? ORDER BY port',
+                (port_start, port_end)
+            )
+            port = port_start
+            for (used,) in self.local.cursor.fetchall():
+                if used != port:
+                    break
+                port += 1
+            if port > port_end:
+                self.local.conn.rollback()
+                return None
+            self.local.cursor.execute('DELETE FROM admin_port WHERE program_id = ?', (program_id,))
+            self.local.cursor.execute(
+                'INSERT INTO admin_port (port, program_id) VALUES (?, ?)', (port, program_id)
+            )
+            self.local.conn.commit()
+            return port
+        except Exception:
+            self.local.conn.rollback()
+            raise
+
+    def release_admin_port(self, program_id):
+        """
+        释放程序登记的 admin UI 端口
+        
+        Args:
+            program_id (int): 程序ID
+        
+        Raises:
+            RuntimeError: 当数据库连接未建立时抛出
+        
+        Returns:
+            bool: 是否释放了端口
+        """
+        if not hasattr(self.local, 'cursor') or not hasattr(self.local, 'conn'):
+            raise RuntimeError("数据库连接尚未建立")
+        self.local.cursor.execute('DELETE FROM admin_port WHERE program_id = ?', (program_id,))
+        self.local.conn.commit()
+        return self.local.cursor.rowcount > 0
+
+    def replace_admin_ports(self, ports):
+        """
+        用给定的分配关系整体替换 admin UI 端口表，用于从配置文件回填
+        
+        Args:
+            ports (dict): 程序ID -> 端口
+        
+        Raises:
+            RuntimeError: 当数据库连接未建立时抛出
+        """
+        if not hasattr(self.local, 'cursor') or not hasattr(self.local, 'conn'):
+            raise RuntimeError("数据库连接尚未建立")
+        try:
+            self.local.cursor.execute('DELETE FROM admin_port')
+            self.local.cursor.executemany(
+                'INSERT INTO admin_port (port, program_id) VALUES (?, ?)',
+                [(port, program_id) for program_id, port in ports.items()]
+            )
+            self.local.conn.commit()
+        except Exception:
+            self.local.conn.rollback()
+            raise
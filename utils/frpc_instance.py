@@ -1,102 +1,167 @@
 import subprocess
-import threading
 import asyncio
 import logging
+import threading
+import time
 from collections import deque
 from pathlib import Path
+from typing import Callable
+from utils.frpc_log import LogRecordBuffer, LogWriter
+from utils.process_supervisor import PipeWatcher
 
 class FrpcInstance:
-    def __init__(self, executable: str, config_path: str, id: str):
+    def __init__(self, 
+                 executable: str, 
+                 config_path: str, 
+                 id: str, 
+                 restart_policy: str = "never",
+                 on_exit: Callable[["FrpcInstance", int], None] | None = None,
+                 on_spawn: Callable[["FrpcInstance"], None] | None = None):
         """
         初始化 FRPC 实例。
 
         Args:
             executable (str): FRPC 可执行文件路径。
             config_path (str): 配置文件路径。
+            id (str): 实例的唯一标识。
+            restart_policy (str): 重启策略，always、on-failure 或 never。
+            on_exit (Callable | None): 进程非主动停止而退出时的回调，参数为(实例, 退出码)。
+            on_spawn (Callable | None): 新进程启动成功后的回调，参数为实例。
         """
         self.executable = executable
         self.config_path = config_path
         self.process = None
-        self.stdout_thread = None
-        self.stderr_thread = None
+        self.watcher = None
+        self.restart_policy = restart_policy
+        # 保护进程的启动，防止并发启动出多个进程
+        self._lock = threading.Lock()
+        self.on_exit = on_exit
+        self.on_spawn = on_spawn
+        # 当前进程正在使用的配置（启动或上次热重载时的 ClientConfig），未知时为 None
+        self.applied_config = None
+        # 是否为主动停止，主动停止的进程退出时不会触发 on_exit
+        self.stop_requested = False
+        self.start_time = None
+        # 自动重启的累计次数
+        self.restart_count = 0
+        # 连续失败次数，用于计算退避时间
+        self.consecutive_failures = 0
+        # 最近自动重启的时间，用于检测崩溃循环
+        self.recent_restarts = deque()
+        self.crash_loop = False
         self.logger = logging.getLogger("utils.frpc_instance")
         self.id = id
         p = Path(executable)
         self.logfile = str(p.with_name("log.log"))
+        self.log_writer = LogWriter(self.logfile)
+        self.log_records = LogRecordBuffer()
 
-    def start(self):
+    def start(self) -> bool:
         """
         启动 FRPC 进程并监控其标准输出与错误输出。
+        进程已在运行时不做任何操作。
+
+        Returns:
+            bool: 本次调用启动了新进程则为 True。
+        """
+        with self._lock:
+            if self.is_running():
+                self.logger.info(f"FRPC id {self.id} 已在运行, 无需启动")
+                return False
+            return self._spawn()
 
-        Raises:
-            Exception: 启动进程时发生的异常。
+    def _spawn(self) -> bool:
+        """
+        启动进程，调用方需持有 self._lock。
         """
         try:
+            self.stop_requested = False
+            self.start_time = time.monotonic()
             self.process = subprocess.Popen(
                 [self.executable, '-c', self.config_path],
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 stdin=subprocess.DEVNULL,
-                bufsize=1,
-                universal_newlines=True,
-                encoding='utf-8'
-            )
-            self.stdout_thread = threading.Thread(
-                target=self._read_output,
-                args=(self.process.stdout, "STDOUT"),
-                daemon=True
             )
-            self.stderr_thread = threading.Thread(
-                target=self._read_output,
-                args=(self.process.stderr, "STDERR"),
-                daemon=True
+            process = self.process
+            self.watcher = PipeWatcher(
+                process, 
+                self._handle_line, 
+                lambda returncode: self._handle_exit(process, returncode)
             )
-            self.stdout_thread.start()
-            self.stderr_thread.start()
+            self.watcher.start()
             self.logger.info(f"FRPC id {self.id} 启动成功 PID: {self.process.pid}")
         except Exception as e:
             self.logger.error(f"FRPC id {self.id} 启动失败: {str(e)}")
+            return False
+        self._notify_spawn()
+        return True
+
+    def _notify_spawn(self):
+        if self.on_spawn is None:
+            return
+        try:
+            self.on_spawn(self)
+        except Exception as e:
+            self.logger.error(f"FRPC id {self.id} 处理启动事件出错: {str(e)}")
 
-    def _read_output(self, pipe, label):
+    def _handle_line(self, line: str, label: str):
         """
-        读取并打印子进程输出。
+        处理子进程输出的一行内容，在后台事件循环中被调用。
 
         Args:
-            pipe (io.TextIOWrapper): 子进程的输出管道（stdout 或 stderr）。
+            line (str): 输出内容（保留颜色编码）。
             label (str): 输出类型标签（"STDOUT" 或 "STDERR"）。
         """
-        dq = deque(maxlen=500)
-        while True:
-            line = pipe.readline() # 保留颜色编码
-            if not line:
-                break
-            dq.append(line)
-            with open(self.logfile, "w", encoding="utf-8") as f:
-                f.writelines(dq)
-            self.logger.info(f"FRPC id {self.id} : {line.strip()}")
-        pipe.close()
+        self.log_writer.write(line)
+        self.log_records.append_line(line)
+        self.logger.info(f"FRPC id {self.id} : {line.strip()}")
+
+    def _handle_exit(self, process: subprocess.Popen, returncode: int):
+        """
+        子进程退出后被调用，在后台事件循环中执行。
+
+        Args:
+            process (subprocess.Popen): 退出的进程。
+            returncode (int): 退出码。
+        """
+        self.logger.info(f"FRPC id {self.id} 进程已退出, 退出码: {returncode}")
+        # 已被停止或替换的旧进程不需要处理
+        if process is not self.process or self.stop_requested:
+            return
+        if self.on_exit:
+            self.on_exit(self, returncode)
     
     async def stop(self):
         """
         优雅地异步终止 FRPC 进程。
         如果进程在指定时间内未退出，则强制终止进程。
+
+        只终止调用时正在运行的进程: 等待期间被并发启动的新进程不受影响，仍由实例跟踪。
         """
-        if self.process and self.process.poll() is None:
-            try:
-                self.process.terminate()
+        with self._lock:
+            self.stop_requested = True
+            process = self.process
+        if process is None:
+            return
+        try:
+            if process.poll() is None:
+                process.terminate()
                 # 等待3秒，若未退出则强制终止
                 for _ in range(30):
-                    if self.process.poll() is not None:
+                    if process.poll() is not None:
                         break
                     await asyncio.sleep(0.1)
                 else:
-                    self.process.kill()
+                    process.kill()
                 self.logger.info(f"FRPC id {self.id} 已停止")
-            except Exception as e:
-                self.logger.error(f"FRPC id {self.id} 停止失败: {str(e)}")
-                raise e
-            finally:
-                self.process = None
+        except Exception as e:
+            self.logger.error(f"FRPC id {self.id} 停止失败: {str(e)}")
+            raise e
+        finally:
+            with self._lock:
+                if self.process is process:
+                    self.process = None
 
     def is_running(self):
         """
@@ -105,4 +170,5 @@ class FrpcInstance:
         Returns:
             bool: 若进程在运行则为 True，否则为 False。
         """
-        return self.process and self.process.poll() is None
+        process = self.process
+        return bool(process and process.poll() is None)
@@ -0,0 +1,200 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List
+
+# 单个日志文件的最大字节数，超过后轮转
+LOG_MAX_BYTES = 512 * 1024
+# 保留的轮转日志文件数量（log.log.1, log.log.2, ...）
+LOG_BACKUP_COUNT = 1
+# 内存中保留的已解析日志记录条数
+LOG_RECORD_LIMIT = 5000
+
+# 日志级别，数值越大越严重
+LOG_LEVELS = {"trace": 0, "debug": 1, "info": 2, "warn": 3, "error": 4}
+_LEVEL_ABBR = {"T": "trace", "D": "debug", "I": "info", "W": "warn", "E": "error"}
+
+_ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+# frpc日志格式: 时间 [级别] [源文件:行号] [run id] [隧道名] 内容, 后三项均可能缺省
+_LOG_LINE_PATTERN = re.compile(
+    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:\.\d+)?) \[([TDIWE])\] "
+    r"(?:\[[^\]\s]+\.go:\d+\] )?(?:\[[0-9a-f]{16}\] )?(?:\[([^\]]+)\] )?(.*)$"
+)
+
+class LogWriter:
+    """
+    FRPC 输出日志写入器。
+    
+    以追加方式写入日志文件，文件超过大小上限时按序号轮转。多个线程可以同时写入。
+    """
+    
+    def __init__(self, 
+                 path: str, 
+                 max_bytes: int = LOG_MAX_BYTES, 
+                 backup_count: int = LOG_BACKUP_COUNT):
+        """
+        初始化日志写入器
+
+        Args:
+            path (str): 日志文件路径
+            max_bytes (int): 单个日志文件的最大字节数
+            backup_count (int): 保留的轮转文件数量
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.lock = threading.Lock()
+        self._file = None
+        self._size = 0
+
+    def _open(self):
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+
+    def _rotate(self):
+        """
+        轮转日志文件: log.log -> log.log.1 -> log.log.2 ...
+        """
+        if self._file:
+            self._file.close()
+            self._file = None
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def write(self, line: str):
+        """
+        追加一行日志
+
+        Args:
+            line (str): 日志内容（包含换行符）
+        """
+        data = line.encode("utf-8")
+        with self.lock:
+            if self._file is None:
+                self._open()
+            if self._size > 0 and self._size + len(data) > self.max_bytes:
+                self._rotate()
+            self._file.write(data) # type: ignore
+            self._file.flush() # type: ignore
+            self._size += len(data)
+
+    def close(self):
+        """
+        关闭日志文件，之后再写入会重新打开
+        """
+        with self.lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+def parse_log_line(line: str) -> Dict[str, Any]:
+    """
+    解析一行frpc日志
+
+    Args:
+        line (str): 原始日志行，可以包含颜色编码
+
+    Returns:
+        dict: `{"time": 时间戳, "level": 级别, "proxy": 隧道名, "message": 内容}`，
+            无法识别格式的行 level 和 proxy 为 None，time 为解析时的时间
+    """
+    text = _ANSI_ESCAPE.sub("", line).rstrip("\r\n")
+    m = _LOG_LINE_PATTERN.match(text)
+    if not m:
+        return {"time": time.time(), "level": None, "proxy": None, "message": text}
+    try:
+        ts = datetime.fromisoformat(m.group(1)).timestamp()
+    except ValueError:
+        ts = time.time()
+    return {
+        "time": ts,
+        "level": _LEVEL_ABBR[m.group(2)],
+        "proxy": m.group(3),
+        "message": m.group(4),
+    }
+
+class LogRecordBuffer:
+    """
+    已解析日志记录的环形缓冲区。
+    
+    写入只有一次 deque.append（在 GIL 下是原子的），查询时先复制一份快照，
+    因此读写双方都不需要加锁。
+    """
+    
+    def __init__(self, limit: int = LOG_RECORD_LIMIT):
+        """
+        初始化缓冲区
+
+        Args:
+            limit (int): 最多保留的记录条数
+        """
+        self.records = deque(maxlen=limit)
+
+    def append_line(self, line: str):
+        """
+        解析并追加一行日志
+
+        Args:
+            line (str): 原始日志行
+        """
+        self.records.append(parse_log_line(line))
+
+    def query(self,
+              level: str | None = None,
+              proxy: str | None = None,
+              since: float | None = None,
+              until: float | None = None,
+              keyword: str | None = None,
+              limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        按条件查询日志记录
+
+        Args:
+            level (str | None): 最低日志级别，例如 warn 会返回 warn 和 error
+            proxy (str | None): 隧道名
+            since (float | None): 起始时间戳（包含）
+            until (float | None): 结束时间戳（包含）
+            keyword (str | None): 日志内容包含的子串
+            limit (int): 最多返回的条数，返回最新的记录
+
+        Raises:
+            ValueError: 日志级别不合法时抛出
+
+        Returns:
+            list: 日志记录列表，旧的在前
+        """
+        min_level = None
+        if level:
+            if level not in LOG_LEVELS:
+                raise ValueError(f"日志级别{level}不合法，可选: {list(LOG_LEVELS.keys())}")
+            min_level = LOG_LEVELS[level]
+        
+        result = []
+        # 从新到旧遍历，凑够limit条即可停止
+        for record in reversed(list(self.records)):
+            if since is not None and record["time"] < since:
+                break
+            if until is not None and record["time"] > until:
+                continue
+            if min_level is not None and \
+                    (record["level"] is None or LOG_LEVELS[record["level"]] < min_level):
+                continue
+            if proxy is not None and record["proxy"] != proxy:
+                continue
+            if keyword and keyword not in record["message"]:
+                continue
+            result.append(record)
+            if len(result) >= limit:
+                break
+        result.reverse()
+        return result
@@ -1,73 +1,30 @@
-import json
+import logging
 from typing import Any, Dict, List, Type
 from entity.client import ClientConfig
-from entity.proxy import (
-    TCPMuxProxyConfig,
-    TCPProxyConfig,
-    UDPProxyConfig,
-    HTTPProxyConfig,
-    HTTPSProxyConfig,
-    STCPProxyConfig,
-    SUDPProxyConfig,
-    XTCPProxyConfig,
-    )
-from entity.visitor import (
-    STCPVisitorConfig, 
-    SUDPVisitorConfig, 
-    XTCPVisitorConfig
-    )
+from entity.proxy import PROXY_TYPE_MAP
+from entity.visitor import VISITOR_TYPE_MAP
 
-# 定义类型映射
-PROXY_TYPE_MAP: Dict[str, Type] = {
-    'tcp': TCPProxyConfig,
-    'udp': UDPProxyConfig,
-    'http': HTTPProxyConfig,
-    'https': HTTPSProxyConfig,
-    'stcp': STCPProxyConfig,
-    'sudp': SUDPProxyConfig,
-    'xtcp': XTCPProxyConfig,
-    'tcpmux': TCPMuxProxyConfig,
-}
+logger = logging.getLogger("utils.load2class")
 
-VISITOR_TYPE_MAP: Dict[str, Type] = {
-    'stcp': STCPVisitorConfig,
-    'sudp': SUDPVisitorConfig,
-    'xtcp': XTCPVisitorConfig,
-}
-
-def load_config(json_str: str) -> ClientConfig:
-    """加载JSON字符串成实体类"""
-    
-    json_data = json.loads(json_str)
-    
-    # 提取并移除proxies和visitors
-    json_proxies = json_data.pop("proxies", [])
-    json_visitors = json_data.pop("visitors", [])
-    
-    # 创建基本配置
-    config = ClientConfig(**json_data)
-    
-    # 加载proxies
-    config.proxies = load_items(json_proxies, PROXY_TYPE_MAP, "Proxy", 
-                               ['tcp', 'udp', 'http', 'https', 'tcpmux', 'stcp', 'sudp', 'xtcp'])
+def load_config_dict(data: Dict[str, Any]) -> ClientConfig:
+    """把解析好的配置字典直接加载成实体类，不经过JSON序列化
     
-    # 加载visitors
-    config.visitors = load_items(json_visitors, VISITOR_TYPE_MAP, "Visitor", 
-                                ['stcp', 'sudp', 'xtcp'])
+    proxies和visitors按type字段的判别联合一次性校验，未知type的条目会被跳过并记录警告。
+    """
     
-    return config
+    data = dict(data)
+    data["proxies"] = filter_items(data.get("proxies") or [], PROXY_TYPE_MAP, "Proxy")
+    data["visitors"] = filter_items(data.get("visitors") or [], VISITOR_TYPE_MAP, "Visitor")
+    return ClientConfig.model_validate(data)
 
-def load_items(items: List[Dict[str, Any]], 
-               type_map: Dict[str, Type], 
-               item_type: str, 
-               allowed_types: List[str]) -> List[Any]:
-    """根据类型映射加载配置项"""
+def filter_items(items: List[Dict[str, Any]], 
+                 type_map: Dict[str, Type], 
+                 item_type: str) -> List[Dict[str, Any]]:
+    """过滤掉type不在类型映射中的配置项"""
     result = []
     for item in items:
-        item_type_value = item.get('type')
-        if item_type_value in type_map:
-            config_class = type_map[item_type_value]
-            result.append(config_class(**item))
+        if isinstance(item, dict) and item.get('type') in type_map:
+            result.append(item)
         else:
-            print(f"警告: {item_type}配置{item}未被加载, 因为他不属于{allowed_types}中任何一种")
+            logger.warning(f"{item_type}配置{item}未被加载, 因为他不属于{list(type_map)}中任何一种")
     return result
@@ -0,0 +1,104 @@
+import logging
+import os
+import subprocess
+from typing import Callable
+from utils.background_loop import get_loop
+
+# 每次从管道读取的最大字节数
+PIPE_READ_SIZE = 64 * 1024
+# 管道关闭后检查进程是否退出的最长间隔（秒）
+EXIT_POLL_MAX_INTERVAL = 1.0
+
+logger = logging.getLogger("utils.process_supervisor")
+
+class PipeWatcher:
+    """
+    在后台事件循环中读取子进程的 stdout/stderr。
+    
+    所有子进程的管道都注册到同一个事件循环的 selector 上，不再为每个进程
+    创建读取线程。这里没有使用 asyncio.create_subprocess_exec: Python 3.12
+    之前默认的 ThreadedChildWatcher 会为每个子进程创建一个等待线程，达不到
+    减少线程的目的，所以仍由 subprocess.Popen 启动进程，只把管道交给事件循环。
+    """
+    
+    def __init__(self,
+                 process: subprocess.Popen,
+                 on_line: Callable[[str, str], None],
+                 on_exit: Callable[[int], None] | None = None):
+        """
+        初始化管道监视器
+
+        Args:
+            process (subprocess.Popen): 以二进制管道启动的子进程
+            on_line (Callable[[str, str], None]): 每读到一行时调用，参数为(行内容, "STDOUT"|"STDERR")
+            on_exit (Callable[[int], None] | None): 进程退出后调用，参数为退出码
+        """
+        self.process = process
+        self.on_line = on_line
+        self.on_exit = on_exit
+        self.loop = get_loop()
+        self._open_pipes = 0
+        self._buffers = {}
+
+    def start(self):
+        """
+        把管道注册到后台事件循环中
+        """
+        for pipe, label in ((self.process.stdout, "STDOUT"), (self.process.stderr, "STDERR")):
+            if pipe is None:
+                continue
+            fd = pipe.fileno()
+            os.set_blocking(fd, False)
+            self._buffers[fd] = b""
+            self._open_pipes += 1
+            self.loop.call_soon_threadsafe(self.loop.add_reader, fd, self._on_readable, pipe, label)
+        if self._open_pipes == 0:
+            self.loop.call_soon_threadsafe(self._wait_exit, 0.1)
+
+    def _emit(self, data: bytes, label: str):
+        try:
+            self.on_line(data.decode("utf-8", errors="replace"), label)
+        except Exception as e:
+            logger.error(f"处理进程 {self.process.pid} 的输出出错: {str(e)}")
+
+    def _on_readable(self, pipe, label: str):
+        fd = pipe.fileno()
+        try:
+            data = os.read(fd, PIPE_READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        
+        if data:
+            *lines, rest = (self._buffers[fd] + data).split(b"\n")
+            self._buffers[fd] = rest
+            for line in lines:
+                self._emit(line + b"\n", label)
+            return
+        
+        # EOF: 输出剩余内容并关闭管道
+        self.loop.remove_reader(fd)
+        if self._buffers[fd]:
+            self._emit(self._buffers[fd], label)
+        del self._buffers[fd]
+        pipe.close()
+        self._open_pipes -= 1
+        if self._open_pipes == 0:
+            self._wait_exit(0.01)
+
+    def _wait_exit(self, interval: float):
+        """
+        管道全部关闭后等待进程退出，间隔逐渐增加
+        """
+        returncode = self.process.poll()
+        if returncode is None:
+            self.loop.call_later(
+                interval, self._wait_exit, min(interval * 2, EXIT_POLL_MAX_INTERVAL)
+            )
+            return
+        if self.on_exit:
+            try:
+                self.on_exit(returncode)
+            except Exception as e:
+                logger.error(f"处理进程 {self.process.pid} 退出事件出错: {str(e)}")
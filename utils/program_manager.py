@@ -1,8 +1,50 @@
+import asyncio
+import random
+import subprocess
 import threading
-from typing import Any, Dict, List
+import time
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping
+from utils.background_loop import get_loop, submit
+from utils.ConfigManager import ConfigManager
 from utils.frpc_instance import FrpcInstance
+from utils.status_collector import fetch_status, new_status_client, webserver_target
 import logging
 
+# 状态轮询的默认间隔（秒）
+STATUS_POLL_INTERVAL = 10.0
+# 轮询间隔的随机抖动比例，避免所有客户端在同一时刻被请求
+STATUS_POLL_JITTER = 0.2
+# 请求失败的客户端退避后的最大轮询间隔（秒）
+STATUS_POLL_MAX_BACKOFF = 300.0
+# 进程启动后等待 webserver 开始监听的时间（秒），之后才进行第一次轮询
+STATUS_POLL_STARTUP_GRACE = 2.0
+
+# 重启策略: 总是重启、异常退出时重启、不重启
+RESTART_POLICIES = ("always", "on-failure", "never")
+DEFAULT_RESTART_POLICY = "on-failure"
+# 自动重启的首次等待时间与最大等待时间（秒）
+RESTART_BACKOFF_BASE = 1.0
+RESTART_BACKOFF_MAX = 60.0
+# 进程运行超过该时间后退出，不计入连续失败，并解除崩溃循环（秒）
+RESTART_STABLE_SECONDS = 60.0
+# 在该时间窗口内自动重启次数达到上限即判定为崩溃循环，之后固定每 RESTART_BACKOFF_MAX 秒重试一次，
+# frps 短暂不可用（loginFailExit 默认为 true，frpc 会立即退出）恢复后客户端仍能自动重连
+CRASH_LOOP_WINDOW = 300.0
+CRASH_LOOP_MAX_RESTARTS = 5
+# 面板启动时同时处于登录阶段的客户端数量上限，避免大量客户端同时登录 frps
+BOOT_CONCURRENCY = 10
+# 面板启动时每个客户端启动后占用并发名额的时间（秒），启动速率约为 BOOT_CONCURRENCY / BOOT_STAGGER 个每秒
+BOOT_STAGGER = 1.0
+
+# 退出时等待所有进程响应 SIGTERM 的总时间（秒），超时后发送 SIGKILL。
+# docker 默认在 SIGTERM 后10秒强制结束容器，这里需要留出余量
+SHUTDOWN_GRACE = 5.0
+# 发送 SIGKILL 后等待进程被回收的时间（秒）
+SHUTDOWN_KILL_WAIT = 1.0
+# 等待进程退出时的轮询间隔（秒）
+SHUTDOWN_POLL_INTERVAL = 0.05
+
 class ProgramManager:
     """
     FRPC 多实例管理器。
@@ -21,10 +63,42 @@ class ProgramManager:
         """
         初始化 ProgramManger，创建空实例列表。
         """
-        self.instances = []
+        # 单例会被多次调用__init__, 只初始化一次
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        # 实例注册表: id -> FrpcInstance, 修改时需持有 self._lock
+        self.instances: Dict[str, FrpcInstance] = {}
+        self._lock = threading.RLock()
         self.logger = logging.getLogger("utils.program_manager")
+        # 状态快照: id -> {"state", "data", "last_updated", "failures"}
+        self.status_snapshot: Dict[str, Dict[str, Any]] = {}
+        self.status_poll_interval = STATUS_POLL_INTERVAL
+        self._next_poll: Dict[str, float] = {}
+        self._poller = None
+        self._poller_lock = threading.Lock()
+        # 退出流程开始后不再自动重启实例, 也不再启动状态轮询
+        self._shutting_down = False
+        self._shutdown_lock = threading.Lock()
+
+    def _new_instance(self, id: str, frpc_path: str, config_path: str, restart_policy: str) -> FrpcInstance:
+        """
+        创建实例对象，不启动进程。
+        """
+        return FrpcInstance(
+            frpc_path, 
+            config_path, 
+            id, 
+            restart_policy=restart_policy, 
+            on_exit=self._on_instance_exit,
+            on_spawn=self._on_instance_spawn
+        )
 
-    def add_instance(self, id: str, frpc_path: str, config_path: str):
+    def add_instance(self, 
+                     id: str, 
+                     frpc_path: str, 
+                     config_path: str, 
+                     restart_policy: str = DEFAULT_RESTART_POLICY) -> bool:
         """
         添加并启动一个新的 FRPC 实例。
 
@@ -32,32 +106,193 @@ class ProgramManager:
             id (str): frpc 实例的唯一标识。
             frpc_path (str): frpc 可执行文件路径。
             config_path (str): 配置文件路径。
+            restart_policy (str): 重启策略，可取值见 RESTART_POLICIES。
 
         Raises:
-            ValueError: 如果已存在相同 id 的实例。
+            ValueError: 如果已存在相同 id 的实例或重启策略不合法。
+
+        Returns:
+            bool: 进程启动成功则为 True。
         """
-        for item in self.instances:
-            if item['id'] == id:
+        if restart_policy not in RESTART_POLICIES:
+            raise ValueError(f"不支持的重启策略: {restart_policy}")
+        with self._lock:
+            if id in self.instances:
                 raise ValueError(f"已存在 id 为 {id} 的 FRPC 实例")
-        frpc = FrpcInstance(frpc_path, config_path, id)
-        frpc.start()
-        self.instances.append({
-            "id": id,
-            "obj": frpc,
+            frpc = self._new_instance(id, frpc_path, config_path, restart_policy)
+            self.instances[id] = frpc
+        # 启动进程时不持有管理器的锁，不同实例可以并发启动
+        started = frpc.start()
+        self.start_status_poller()
+        return started
+
+    async def boot(self, 
+                   programs: List[tuple], 
+                   concurrency: int = BOOT_CONCURRENCY, 
+                   stagger: float = BOOT_STAGGER) -> Dict[str, str | None]:
+        """
+        面板启动时按期望状态启动客户端，在后台事件循环中执行。
+
+        每个客户端启动后占用一个并发名额 stagger 秒，同时占用名额的客户端不超过
+        concurrency 个，几百个客户端会以平稳的速率依次登录 frps，而不是同时登录。
+        已存在的实例（在启动过程中被手动启停过的客户端）会被跳过。
+
+        Args:
+            programs (List[tuple]): 每个元素为 (id, frpc_path, config_path, restart_policy)。
+            concurrency (int): 同时处于登录阶段的客户端数量上限。
+            stagger (float): 每个客户端占用并发名额的时间（秒）。
+
+        Returns:
+            Dict[str, str | None]: 本次尝试启动的实例 id -> 错误信息，启动成功时为 None，跳过的实例不包含在内。
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        started_at = time.monotonic()
+        results: Dict[str, str | None] = {}
+        
+        async def boot_one(id: str, frpc_path: str, config_path: str, restart_policy: str):
+            async with semaphore:
+                with self._lock:
+                    if self._shutting_down or id in self.instances:
+                        return
+                try:
+                    started = self.add_instance(id, frpc_path, config_path, restart_policy)
+                except ValueError as e:
+                    results[id] = str(e)
+                    return
+                if not started:
+                    results[id] = "进程启动失败"
+                    return
+                results[id] = None
+                await asyncio.sleep(stagger)
+        
+        await asyncio.gather(*(boot_one(*program) for program in programs))
+        failed = {id: error for id, error in results.items() if error}
+        for id, error in failed.items():
+            self.logger.error(f"FRPC id {id} 按期望状态启动失败: {error}")
+        self.logger.info(
+            f"已按期望状态启动{len(results) - len(failed)}个 Frpc, 失败{len(failed)}个, "
+            f"跳过{len(programs) - len(results)}个, 耗时{time.monotonic() - started_at:.2f}秒"
+        )
+        return results
+
+    def _load_applied_config(self, frpc: FrpcInstance):
+        """
+        读取实例当前的配置文件，作为进程正在使用的配置，读取失败时返回 None。
+        """
+        try:
+            return ConfigManager(frpc.config_path).load_config()
+        except Exception as e:
+            self.logger.warning(f"FRPC id {frpc.id} 读取配置失败, 下次重载时无法判断配置的变化: {str(e)}")
+            return None
+
+    def _on_instance_spawn(self, frpc: FrpcInstance):
+        """
+        实例启动新进程后调用: 记录进程使用的配置。
+        """
+        frpc.applied_config = self._load_applied_config(frpc)
+        # 旧进程的状态快照已失效，新进程的 webserver 启动需要时间，稍后再轮询
+        self.status_snapshot.pop(frpc.id, None)
+        self._next_poll[frpc.id] = time.monotonic() + STATUS_POLL_STARTUP_GRACE
+
+    def ensure_started(self, 
+                       id: str, 
+                       frpc_path: str, 
+                       config_path: str, 
+                       restart_policy: str = DEFAULT_RESTART_POLICY) -> bool:
+        """
+        确保指定 id 的 FRPC 实例正在运行: 不存在则添加并启动，已存在则手动启动。
+        并发调用时同一个客户端只会启动一个进程。
+
+        Args:
+            id (str): frpc 实例的唯一标识。
+            frpc_path (str): frpc 可执行文件路径。
+            config_path (str): 配置文件路径。
+            restart_policy (str): 重启策略，可取值见 RESTART_POLICIES。
+
+        Raises:
+            ValueError: 重启策略不合法时抛出。
+
+        Returns:
+            bool: 本次调用启动了新进程则为 True，实例原本就在运行或启动失败则为 False。
+        """
+        if restart_policy not in RESTART_POLICIES:
+            raise ValueError(f"不支持的重启策略: {restart_policy}")
+        # 只在登记实例时持有管理器的锁，启动进程在锁外进行，
+        # 同一实例的并发启动由实例自身的锁保证只启动一个进程
+        with self._lock:
+            frpc = self.instances.get(id)
+            created = frpc is None
+            if created:
+                frpc = self._new_instance(id, frpc_path, config_path, restart_policy)
+                self.instances[id] = frpc
+            else:
+                frpc.restart_policy = restart_policy # type: ignore
+        if created:
+            started = frpc.start() # type: ignore
+            self.start_status_poller()
+            return started
+        return self.start_instance(id)
+
+    def start_instance(self, id: str) -> bool:
+        """
+        手动启动已存在的 FRPC 实例，同时清除崩溃循环等自动重启状态。
+
+        Args:
+            id (str): 实例的唯一标识。
+
+        Raises:
+            ValueError: 如果不存在该 id 的实例。
+
+        Returns:
+            bool: 本次调用启动了新进程则为 True，实例原本就在运行则为 False。
+        """
+        frpc = self.get_instance(id)
+        if frpc is None:
+            raise ValueError(f"不存在 id 为 {id} 的 FRPC 实例")
+        frpc.consecutive_failures = 0
+        frpc.recent_restarts.clear()
+        frpc.crash_loop = False
+        return frpc.start()
+
+    def set_restart_policy(self, id: str, restart_policy: str):
+        """
+        修改实例的重启策略，实例不存在时不做任何操作。
+
+        Args:
+            id (str): 实例的唯一标识。
+            restart_policy (str): 重启策略，可取值见 RESTART_POLICIES。
+
+        Raises:
+            ValueError: 重启策略不合法时抛出。
+        """
+        if restart_policy not in RESTART_POLICIES:
+            raise ValueError(f"不支持的重启策略: {restart_policy}")
+        frpc = self.get_instance(id)
+        if frpc is not None:
+            frpc.restart_policy = restart_policy
+
+    def _status_of(self, id: str, frpc: FrpcInstance) -> Mapping[str, Any]:
+        """
+        生成实例状态的只读快照。
+        """
+        return MappingProxyType({
+            "id": id, 
+            "status": "运行" if frpc.is_running() else "停止",
+            "restart_policy": frpc.restart_policy,
+            "restart_count": frpc.restart_count,
+            "crash_loop": frpc.crash_loop,
         })
 
-    def get_status(self) -> List[Dict[str, Any]]:
+    def get_status(self) -> List[Mapping[str, Any]]:
         """
         实时获取所有 FRPC 实例的当前状态。
 
         Returns:
-            list: 每个元素为 {'id', 'status'} 的列表。
+            list: 每个元素为 {'id', 'status', 'restart_policy', 'restart_count', 'crash_loop'} 的只读快照。
         """
-        status_list = []
-        for item in self.instances:
-            status = "运行" if item['obj'].is_running() else "停止"
-            status_list.append({"id": item['id'], "status": status})
-        return status_list
+        with self._lock:
+            items = list(self.instances.items())
+        return [self._status_of(id, frpc) for id, frpc in items]
 
     def get_instance(self, id: str) -> FrpcInstance | None:
         """
@@ -69,16 +304,222 @@ class ProgramManager:
         Returns:
             FrpcInstance: 找到的实例对象，未找到返回 None。
         """
-        for item in self.instances:
-            if item['id'] == id:
-                return item['obj']
-        return None
+        return self.instances.get(id)
+
+    def shutdown(self, grace: float = SHUTDOWN_GRACE):
+        """
+        程序退出时关闭所有 FRPC 进程，可以重复调用，只有第一次生效。
+
+        先停止状态轮询并关闭自动重启，然后同时向所有进程发送 SIGTERM，
+        在同一个截止时间内等待它们退出，超时仍未退出的进程发送 SIGKILL。
+        整个过程不依赖后台事件循环，可以在 atexit 和信号处理函数中调用。
+
+        Args:
+            grace (float): 等待进程响应 SIGTERM 的总时间（秒）。
+        """
+        with self._shutdown_lock:
+            if self._shutting_down:
+                return
+            self._shutting_down = True
+        started = time.monotonic()
+        self.stop_status_poller()
+        
+        with self._lock:
+            targets = list(self.instances.values())
+        pending = {}
+        for frpc in targets:
+            # 持有实例锁，避免与正在进行的启动交错
+            with frpc._lock:
+                frpc.stop_requested = True
+                process = frpc.process
+            if process is None or process.poll() is not None:
+                continue
+            try:
+                process.terminate()
+                pending[frpc.id] = process
+            except OSError as e:
+                self.logger.error(f"FRPC id {frpc.id} 发送 SIGTERM 失败: {str(e)}")
+        total = len(pending)
+        if total:
+            self.logger.info(f"正在关闭{total}个 Frpc")
+        
+        deadline = started + grace
+        while pending and time.monotonic() < deadline:
+            pending = {id: p for id, p in pending.items() if p.poll() is None}
+            if pending:
+                time.sleep(SHUTDOWN_POLL_INTERVAL)
+        
+        killed = list(pending)
+        for id, process in pending.items():
+            self.logger.warning(f"FRPC id {id} 在{grace:.1f}秒内未退出，强制结束")
+            try:
+                process.kill()
+            except OSError as e:
+                self.logger.error(f"FRPC id {id} 发送 SIGKILL 失败: {str(e)}")
+        kill_deadline = time.monotonic() + SHUTDOWN_KILL_WAIT
+        for id, process in pending.items():
+            try:
+                process.wait(max(kill_deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                self.logger.error(f"FRPC id {id} (PID {process.pid}) 强制结束后仍未退出")
+        
+        self.logger.info(
+            f"已关闭{total}个 Frpc, 其中{len(killed)}个被强制结束, "
+            f"耗时{time.monotonic() - started:.2f}秒"
+        )
+
+    def _on_instance_exit(self, frpc: FrpcInstance, returncode: int):
+        """
+        实例的进程非主动停止而退出时调用，在后台事件循环中执行。
+        根据重启策略决定是否以指数退避的方式重新启动。
+        """
+        if self._shutting_down or frpc.restart_policy == "never":
+            return
+        if frpc.restart_policy == "on-failure" and returncode == 0:
+            return
+        
+        now = time.monotonic()
+        if frpc.start_time is not None and now - frpc.start_time >= RESTART_STABLE_SECONDS:
+            frpc.consecutive_failures = 0
+            frpc.recent_restarts.clear()
+            frpc.crash_loop = False
+        
+        while frpc.recent_restarts and now - frpc.recent_restarts[0] > CRASH_LOOP_WINDOW:
+            frpc.recent_restarts.popleft()
+        if len(frpc.recent_restarts) >= CRASH_LOOP_MAX_RESTARTS:
+            if not frpc.crash_loop:
+                frpc.crash_loop = True
+                self.logger.error(
+                    f"FRPC id {frpc.id} 在{CRASH_LOOP_WINDOW:.0f}秒内已自动重启{len(frpc.recent_restarts)}次，"
+                    f"判定为崩溃循环，之后每{RESTART_BACKOFF_MAX:.0f}秒重试一次"
+                )
+            delay = RESTART_BACKOFF_MAX
+        else:
+            delay = min(RESTART_BACKOFF_BASE * (2 ** frpc.consecutive_failures), RESTART_BACKOFF_MAX)
+            frpc.consecutive_failures += 1
+        self.logger.warning(f"FRPC id {frpc.id} 异常退出(退出码 {returncode})，{delay:.1f}秒后自动重启")
+        get_loop().call_later(delay, self._restart_instance, frpc)
+
+    def _restart_instance(self, frpc: FrpcInstance):
+        """
+        执行自动重启，期间被手动停止或已被手动启动的实例会被跳过。
+        """
+        if self._shutting_down or frpc.stop_requested or frpc.is_running():
+            return
+        frpc.recent_restarts.append(time.monotonic())
+        frpc.restart_count += 1
+        self.logger.info(f"FRPC id {frpc.id} 第{frpc.restart_count}次自动重启")
+        frpc.start()
+
+    def start_status_poller(self, interval: float | None = None):
+        """
+        启动后台状态轮询任务，重复调用不会启动多个任务。
+
+        轮询任务运行在后台事件循环中，定期请求所有运行中实例的 webserver
+        /api/status 接口，并把结果保存到 status_snapshot 中。请求失败的实例
+        按指数退避降低轮询频率。
+
+        Args:
+            interval (float | None): 轮询间隔（秒），为 None 时使用当前设置。
+        """
+        if interval is not None:
+            self.status_poll_interval = interval
+        with self._poller_lock:
+            if self._shutting_down:
+                return
+            if self._poller is not None and not self._poller.done():
+                return
+            self._poller = submit(self._status_poll_loop())
+
+    def stop_status_poller(self):
+        """
+        停止后台状态轮询任务。
+        """
+        with self._poller_lock:
+            if self._poller is not None:
+                self._poller.cancel()
+                self._poller = None
+
+    def get_status_snapshot(self, id: str) -> Dict[str, Any] | None:
+        """
+        获取指定实例最近一次的状态快照。
+
+        Args:
+            id (str): 实例的唯一标识。
+
+        Returns:
+            dict | None: 快照，格式为
+                `{"state": "ok"|"timeout"|"error", "data": ..., "last_updated": 时间戳, "failures": 连续失败次数}`，
+                没有快照时返回 None。
+        """
+        return self.status_snapshot.get(id)
+
+    def update_status_snapshot(self, id: str, result: Dict[str, Any]):
+        """
+        用一次状态请求的结果更新快照，并计算该实例下一次轮询的时间。
+
+        Args:
+            id (str): 实例的唯一标识。
+            result (dict): status_collector.fetch_status 返回的单个结果。
+        """
+        old = self.status_snapshot.get(id)
+        failures = 0 if result["state"] == "ok" else (old["failures"] + 1 if old else 1)
+        self.status_snapshot[id] = {
+            "state": result["state"],
+            "data": result.get("data"),
+            "last_updated": time.time(),
+            "failures": failures,
+        }
+        if old is None and failures:
+            # 进程启动后的第一次请求就失败，多半是 webserver 还没开始监听，很快再试一次
+            delay = STATUS_POLL_STARTUP_GRACE
+        else:
+            # 第一次失败按正常间隔重试，连续失败时才指数退避
+            delay = min(self.status_poll_interval * (2 ** max(failures - 1, 0)), STATUS_POLL_MAX_BACKOFF)
+            delay *= random.uniform(1 - STATUS_POLL_JITTER, 1 + STATUS_POLL_JITTER)
+        self._next_poll[id] = time.monotonic() + delay
+
+    def _status_targets(self, ids: List[str]) -> Dict[str, Any]:
+        """
+        为需要轮询的实例生成请求目标，未配置 webserver 的实例会被跳过。
+        """
+        targets = {}
+        for id in ids:
+            frpc = self.get_instance(id)
+            if frpc is None:
+                continue
+            try:
+                target = webserver_target(ConfigManager(frpc.config_path).load_config())
+            except Exception as e:
+                self.logger.warning(f"状态轮询: 读取实例 {id} 的配置失败: {str(e)}")
+                target = None
+            if target:
+                targets[id] = target
+            else:
+                self._next_poll[id] = time.monotonic() + self.status_poll_interval
+        return targets
 
-    def stop_all(self):
+    async def _status_poll_loop(self):
         """
-        停止所有正在运行的 FRPC 实例。
+        后台状态轮询任务主体。
         """
-        self.logger.info("正在关闭所有 Frpc")
-        for item in self.instances:
-            if item['obj'].is_running():
-                item['obj'].stop()
+        loop = asyncio.get_running_loop()
+        async with new_status_client() as client:
+            while True:
+                now = time.monotonic()
+                running = {item['id'] for item in self.get_status() if item['status'] == "运行"}
+                # 清理已经停止的实例
+                for id in list(self.status_snapshot.keys()):
+                    if id not in running:
+                        self.status_snapshot.pop(id, None)
+                        self._next_poll.pop(id, None)
+                due = [id for id in running if self._next_poll.get(id, 0) <= now]
+                if due:
+                    try:
+                        targets = await loop.run_in_executor(None, self._status_targets, due)
+                        results = await fetch_status(targets, client=client)
+                        for id, result in results.items():
+                            self.update_status_snapshot(id, result)
+                    except Exception as e:
+                        self.logger.error(f"状态轮询出错: {str(e)}")
+                await asyncio.sleep(min(1.0, self.status_poll_interval))
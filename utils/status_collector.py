@@ -0,0 +1,132 @@
+import asyncio
+import logging
+from typing import Any, Dict, Tuple
+import httpx
+from utils.background_loop import in_background_loop, submit
+
+# 同时请求的客户端webserver数量上限
+STATUS_CONCURRENCY = 32
+# 单个客户端请求的超时时间（秒）
+STATUS_TIMEOUT = 3.0
+
+logger = logging.getLogger("utils.status_collector")
+
+# 请求目标: 客户端id -> (url, (user, password))
+StatusTargets = Dict[str, Tuple[str, Tuple[str, str]]]
+
+def new_status_client(
+    concurrency: int = STATUS_CONCURRENCY,
+    timeout: float = STATUS_TIMEOUT,
+    ) -> httpx.AsyncClient:
+    """
+    创建用于请求webserver的httpx客户端，连接池大小与并发数一致
+
+    Args:
+        concurrency (int): 最大并发请求数
+        timeout (float): 请求超时时间（秒）
+
+    Returns:
+        httpx.AsyncClient: 异步http客户端
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(timeout=timeout, limits=limits)
+
+async def fetch_status(
+    targets: StatusTargets,
+    concurrency: int = STATUS_CONCURRENCY,
+    timeout: float = STATUS_TIMEOUT,
+    client: httpx.AsyncClient | None = None,
+    ) -> Dict[str, Dict[str, Any]]:
+    """
+    并发请求多个frpc客户端webserver的状态接口。
+    
+    所有请求共享同一个连接池，并通过信号量限制并发数。单个客户端超时或出错
+    不会影响其它客户端的结果。
+
+    Args:
+        targets (StatusTargets): 客户端id到(url, auth)的映射
+        concurrency (int): 最大并发请求数
+        timeout (float): 单个请求的超时时间（秒）
+        client (httpx.AsyncClient | None): 复用的http客户端，为None时临时创建
+
+    Returns:
+        dict: 客户端id -> 结果，结果格式为以下之一
+            - `{"state": "ok", "data": {...}}`: 请求成功，data为接口返回的json
+            - `{"state": "timeout"}`: 请求超时
+            - `{"state": "error", "message": "..."}`: 请求失败
+    """
+    if not targets:
+        return {}
+    if client is None:
+        async with new_status_client(concurrency, timeout) as client:
+            return await fetch_status(targets, concurrency, timeout, client)
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def fetch_one(id: str, url: str, auth: Tuple[str, str]):
+        async with semaphore:
+            try:
+                # 整体截止时间，避免连接建立后对端迟迟不返回
+                response = await asyncio.wait_for(client.get(url, auth=auth), timeout)
+            except (asyncio.TimeoutError, httpx.TimeoutException):
+                logger.warning(f"请求客户端{id}的webserver超时")
+                return id, {"state": "timeout"}
+            except Exception as e:
+                logger.warning(f"请求客户端{id}的webserver失败, 错误：{str(e)}")
+                return id, {"state": "error", "message": str(e)}
+        
+        if response.status_code != 200:
+            message = f"错误码{response.status_code}, 内容：{response.text[:200].strip()}"
+            logger.warning(f"请求客户端{id}的webserver失败，{message}")
+            return id, {"state": "error", "message": message}
+        try:
+            return id, {"state": "ok", "data": response.json()}
+        except ValueError as e:
+            logger.warning(f"解析客户端{id}的webserver响应失败，错误：{str(e)}")
+            return id, {"state": "error", "message": str(e)}
+    
+    results = await asyncio.gather(
+        *(fetch_one(id, url, auth) for id, (url, auth) in targets.items())
+    )
+    return dict(results)
+
+def collect_status(
+    targets: StatusTargets,
+    concurrency: int = STATUS_CONCURRENCY,
+    timeout: float = STATUS_TIMEOUT,
+    ) -> Dict[str, Dict[str, Any]]:
+    """
+    fetch_status的同步版本，在后台事件循环中执行并等待结果。
+
+    Args:
+        targets (StatusTargets): 客户端id到(url, auth)的映射
+        concurrency (int): 最大并发请求数
+        timeout (float): 单个请求的超时时间（秒）
+
+    Raises:
+        RuntimeError: 在后台事件循环线程中调用时抛出（会导致死锁）
+
+    Returns:
+        dict: 格式同fetch_status
+    """
+    if not targets:
+        return {}
+    if in_background_loop():
+        raise RuntimeError("不能在后台事件循环中同步等待, 请直接await fetch_status")
+    return submit(fetch_status(targets, concurrency, timeout)).result()
+
+def webserver_target(config, api: str = "/api/status") -> Tuple[str, Tuple[str, str]] | None:
+    """
+    根据客户端配置生成webserver接口的请求目标
+
+    Args:
+        config (ClientConfig): 客户端配置
+        api (str): 接口路径
+
+    Returns:
+        tuple | None: (url, (user, password))，未完整配置webserver时返回None
+    """
+    ws = config.webServer
+    if not (ws and ws.addr and ws.port and ws.user and ws.password):
+        return None
+    return f"http://{ws.addr}:{ws.port}{api}", (ws.user, ws.password)